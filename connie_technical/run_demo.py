@@ -1,5 +1,4 @@
 import argparse
-import json
 import os
 from dataclasses import asdict, dataclass
 from datetime import datetime, timezone
@@ -7,24 +6,27 @@ from pathlib import Path
 
 import numpy as np
 import pandas as pd
+import orjson
 import yfinance as yf
-from dotenv import load_dotenv
 
 # Load .env from Hybrid root (parent directory) or local
 PROJECT_ROOT = Path(__file__).parent
 HYBRID_ROOT = PROJECT_ROOT.parent
 
-if (HYBRID_ROOT / ".env").exists():
-    load_dotenv(HYBRID_ROOT / ".env")
-else:
-    load_dotenv(PROJECT_ROOT / ".env")
+# When launched by the hybrid controller the key is already in the environment,
+# so only read a .env file when it is missing. load_dotenv returns False when
+# the file is missing, so no separate exists() probe.
+if not os.getenv("OPENAI_API_KEY"):
+    from dotenv import load_dotenv
+    load_dotenv(HYBRID_ROOT / ".env") or load_dotenv(PROJECT_ROOT / ".env")
 
 from src.signals.signal import build_signals
+from src.signals.ewm import HAS_NUMBA, macd_arrays
 from src.backtest.backtest import run_backtest
 from src.reporting.llm_report import (
     build_evidence_pack,
-    llm_generate_trade_note,
-    llm_generate_full_report,
+    FULL_REPORT_MAX_TOKENS,
+    llm_generate_reports,
 )
 from src.reporting.pdf_report import generate_pdf_report
 from src.viz.equity import plot_combined_equity_drawdown, plot_equity_log, plot_drawdown_compare
@@ -32,6 +34,18 @@ from src.viz.trade_timeline import plot_golden_cross_with_trades
 from src.viz.price_ma_macd import plot_price_ma_macd
 
 
+# Storage dtype for indicator columns. TECH_AGENT_DTYPE=float32 halves their
+# footprint, but it is not only a memory setting: signal.py compares the
+# downcast MAs against the float64 Close, so near-ties (e.g. flat stretches)
+# can flip the regime flag and the Gate 2 decision. float64 is the reference.
+_INDICATOR_DTYPES = {"float32": np.float32, "float64": np.float64}
+_indicator_dtype_name = os.environ.get("TECH_AGENT_DTYPE", "float64")
+if _indicator_dtype_name not in _INDICATOR_DTYPES:
+    raise ValueError(
+        f"TECH_AGENT_DTYPE must be 'float32' or 'float64', got {_indicator_dtype_name!r}"
+    )
+INDICATOR_DTYPE = np.dtype(_INDICATOR_DTYPES[_indicator_dtype_name])
+
 
 # Fallback company names for common tickers
 COMPANY_NAMES = {
@@ -65,11 +79,29 @@ def ensure_dir(path: str) -> None:
     os.makedirs(path, exist_ok=True)
 
 
+def _json_default(obj):
+    # Only reached for types orjson has no native encoder for (numpy scalars
+    # and arrays are handled by OPT_SERIALIZE_NUMPY, datetimes are passed
+    # through so they are written in their str() form)
+    return str(obj)
+
+
 def save_json(obj, path: str) -> None:
     """Safe JSON writer for evidence/config/metrics (no dependency on llm_report.py helpers)."""
     ensure_dir(os.path.dirname(path) or ".")
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(obj, f, indent=2, ensure_ascii=False, default=str)
+    # NaN/inf are written as null; consumers treat null metrics as undefined
+    data = orjson.dumps(
+        obj,
+        default=_json_default,
+        option=(
+            orjson.OPT_INDENT_2
+            | orjson.OPT_SERIALIZE_NUMPY
+            | orjson.OPT_PASSTHROUGH_DATETIME
+            | orjson.OPT_NON_STR_KEYS
+        ),
+    )
+    with open(path, "wb") as f:
+        f.write(data)
 
 
 def flatten_columns(df: pd.DataFrame) -> pd.DataFrame:
@@ -90,16 +122,34 @@ def compute_rsi(series: pd.Series, window: int = 14) -> pd.Series:
     avg_gain = gain.rolling(window=window, min_periods=window).mean()
     avg_loss = loss.rolling(window=window, min_periods=window).mean()
 
-    rs = avg_gain / avg_loss.replace(0, np.nan)
-    rsi = 100 - (100 / (1 + rs))
+    g = avg_gain.to_numpy()
+    l = avg_loss.to_numpy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = 100.0 - 100.0 / (1.0 + g / l)
 
-    # Handle edge cases deterministically
-    rsi = rsi.where(~(avg_loss == 0), 100)
-    rsi = rsi.where(~(avg_gain == 0), 0)
-    return rsi
+    # Handle edge cases deterministically (no losses -> 100, no gains -> 0)
+    rsi = np.where(l == 0.0, 100.0, rsi)
+    rsi = np.where(g == 0.0, 0.0, rsi)
+    return pd.Series(rsi, index=series.index, name=f"RSI_{window}")
+
+
+def compute_moving_averages(series: pd.Series, windows=(20, 50, 200)) -> dict:
+    """Simple moving averages for several windows.
+
+    Uses pandas rolling rather than a shared cumulative sum: rolling().mean()
+    is exact on flat stretches (halts, forward-filled prices), so Close/MA
+    comparisons that feed the regime flag and Gate 2 tie the same way.
+    """
+    return {w: series.rolling(w, min_periods=w).mean().rename(f"MA{w}") for w in windows}
 
 
 def compute_macd(series: pd.Series, fast: int = 12, slow: int = 26, signal: int = 9):
+    a = series.to_numpy(dtype=np.float64)
+    if HAS_NUMBA and not np.isnan(a).any():
+        macd, macd_signal, macd_hist = macd_arrays(a, fast, slow, signal)
+        idx = series.index
+        return pd.Series(macd, index=idx), pd.Series(macd_signal, index=idx), pd.Series(macd_hist, index=idx)
+
     ema_fast = series.ewm(span=fast, adjust=False).mean()
     ema_slow = series.ewm(span=slow, adjust=False).mean()
     macd = ema_fast - ema_slow
@@ -108,6 +158,22 @@ def compute_macd(series: pd.Series, fast: int = 12, slow: int = 26, signal: int
     return macd, macd_signal, macd_hist
 
 
+def compute_indicators(close: pd.Series) -> pd.DataFrame:
+    """RSI, moving averages and MACD for a close series, coerced to float64 once."""
+    if close.dtype != np.float64:
+        close = close.astype(np.float64)
+
+    features = {"RSI_14": compute_rsi(close, 14)}
+    for w, ma in compute_moving_averages(close, (20, 50, 200)).items():
+        features[f"MA{w}"] = ma
+    features["MACD"], features["MACD_Signal"], features["MACD_Hist"] = compute_macd(close)
+
+    out = pd.DataFrame(features, index=close.index)
+    if INDICATOR_DTYPE != np.float64:
+        out = out.astype(INDICATOR_DTYPE)
+    return out
+
+
 def _infer_equity_column(out: pd.DataFrame) -> str | None:
     """
     Try to infer which column in `out` is the equity curve.
@@ -133,9 +199,12 @@ def _infer_equity_column(out: pd.DataFrame) -> str | None:
     if not numeric_cols:
         return None
 
-    # Heuristic: prefer columns containing 'equity' or 'value'
-    preferred = [c for c in numeric_cols if ("equity" in str(c).lower() or "value" in str(c).lower())]
-    return preferred[0] if preferred else numeric_cols[0]
+    # Heuristic: prefer columns containing 'equity' or 'value' (lowercase each name once)
+    for c in numeric_cols:
+        name = str(c).lower()
+        if "equity" in name or "value" in name:
+            return c
+    return numeric_cols[0]
 
 
 @dataclass
@@ -148,6 +217,7 @@ class DemoConfig:
     plot: bool = True
     llm: bool = True
     llm_model: str = "gpt-4o-mini"
+    llm_max_tokens: int = FULL_REPORT_MAX_TOKENS
 
 
 def run_pipeline(cfg: DemoConfig):
@@ -169,15 +239,8 @@ def run_pipeline(cfg: DemoConfig):
     df = flatten_columns(df).sort_index()
 
     # Step 2: Features
-    df["RSI_14"] = compute_rsi(df["Close"], 14)
-    df["MA20"] = df["Close"].rolling(20, min_periods=20).mean()
-    df["MA50"] = df["Close"].rolling(50, min_periods=50).mean()
-    df["MA200"] = df["Close"].rolling(200, min_periods=200).mean()
-
-    macd, macd_signal, macd_hist = compute_macd(df["Close"])
-    df["MACD"] = macd
-    df["MACD_Signal"] = macd_signal
-    df["MACD_Hist"] = macd_hist
+    features = compute_indicators(df["Close"])
+    df[features.columns] = features
 
     # Step 3: Signals
     df = df.dropna(subset=["MA200", "MACD", "MACD_Signal", "RSI_14"]).copy()
@@ -267,7 +330,7 @@ def run_pipeline(cfg: DemoConfig):
     # Price + MAs + MACD (6 months)
     price_macd_6m_path = os.path.join(cfg.outdir, f"{cfg.ticker}_price_ma_macd_6m.png")
     try:
-        df_6m = df.copy().sort_index()
+        df_6m = df.sort_index()
         end = df_6m.index.max()
         start = end - pd.Timedelta(days=182)
         df_6m = df_6m.loc[(df_6m.index >= start) & (df_6m.index <= end)]
@@ -344,13 +407,12 @@ def run_pipeline(cfg: DemoConfig):
         if not api_key_present:
             print("INFO: OPENAI_API_KEY not set; skipping LLM report generation.")
         else:
-            # Short trade note
-            llm_note = llm_generate_trade_note(evidence, model=cfg.llm_model)
+            # Short trade note and final (longer) report, requested concurrently
+            llm_note, final_report = llm_generate_reports(
+                evidence, model=cfg.llm_model, max_tokens=cfg.llm_max_tokens
+            )
             with open(md_path, "w", encoding="utf-8") as f:
                 f.write(llm_note)
-
-            # Final report (longer)
-            final_report = llm_generate_full_report(evidence, model=cfg.llm_model)
             with open(final_md_path, "w", encoding="utf-8") as f:
                 f.write(final_report)
 
@@ -412,6 +474,8 @@ def main():
     parser.add_argument("--no-plot", action="store_true", help="Disable visualisations.")
     parser.add_argument("--no-llm", action="store_true", help="Disable LLM report generation.")
     parser.add_argument("--llm-model", type=str, default="gpt-4o-mini")
+    parser.add_argument("--llm-max-tokens", type=int, default=FULL_REPORT_MAX_TOKENS,
+                        help="Output token cap for the full LLM report.")
 
     args = parser.parse_args()
     cfg = DemoConfig(
@@ -422,6 +486,7 @@ def main():
         plot=not args.no_plot,
         llm=not args.no_llm,
         llm_model=args.llm_model,
+        llm_max_tokens=args.llm_max_tokens,
     )
 
     df, out, trade, metrics, artifacts = run_pipeline(cfg)
@@ -6,11 +6,25 @@ and generate narrative reports using OpenAI's API.
 """
 from __future__ import annotations
 
-import json
-from typing import Any, Dict, List, Optional
-
+import functools
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from string import Template
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import orjson
 import pandas as pd
-from openai import OpenAI
+
+
+def _iso_dates(col: pd.Series) -> List[str]:
+    """YYYY-MM-DD strings for a date column, parsed in one vectorised call."""
+    return [str(d) for d in pd.to_datetime(col).dt.date]
+
+
 def build_evidence_pack(
     out: pd.DataFrame,
     trades: pd.DataFrame,
@@ -26,7 +40,6 @@ def build_evidence_pack(
     - LLM writes narrative ONLY using numbers we computed (no invented data).
     - latest_state should come from df (features/signals), not out.
     """
-    out = out.copy()
     start = str(out.index.min().date())
     end = str(out.index.max().date())
 
@@ -56,17 +69,16 @@ def build_evidence_pack(
 
     # Pull technical snapshot from df if provided
     if isinstance(df, pd.DataFrame) and len(df) > 0:
-        dfx = df.copy()
-        last = dfx.iloc[-1]
-        latest_state["date"] = str(dfx.index[-1].date())
-        if "Close" in dfx.columns:
+        last = df.iloc[-1]
+        latest_state["date"] = str(df.index[-1].date())
+        if "Close" in df.columns:
             latest_state["close"] = float(last["Close"])
-        if "entry" in dfx.columns:
+        if "entry" in df.columns:
             latest_state["entry"] = bool(last["entry"])
-        if "exit" in dfx.columns:
+        if "exit" in df.columns:
             latest_state["exit"] = bool(last["exit"])
         for k in ["RSI_14", "MACD", "MACD_Signal", "MA20", "MA50", "MA200"]:
-            if k in dfx.columns and pd.notna(last[k]):
+            if k in df.columns and pd.notna(last[k]):
                 latest_state[k] = float(last[k])
     else:
         # fallback: attempt from out (best-effort)
@@ -94,30 +106,28 @@ def build_evidence_pack(
         exit_col = next((c for c in ["exit_date", "exit", "ExitDate"] if c in trades.columns), None)
 
         if ret_col is not None:
+            # Build one record per trade, then index into it for both views
+            trades = trades.reset_index(drop=True)
+            n = len(trades)
+            entry_dates = _iso_dates(trades[entry_col]) if entry_col else [None] * n
+            exit_dates = _iso_dates(trades[exit_col]) if exit_col else [None] * n
+            records = [
+                {
+                    "entry_date": entry_dates[i],
+                    "exit_date": exit_dates[i],
+                    "trade_metric_name": ret_col,
+                    "trade_metric_value": float(v) if pd.notna(v) else None,
+                }
+                for i, v in enumerate(trades[ret_col])
+            ]
+
             # All trades sorted by entry date
-            t_all = trades.sort_values(entry_col) if entry_col else trades
-            for _, r in t_all.iterrows():
-                all_trades.append(
-                    {
-                        "entry_date": str(pd.to_datetime(r[entry_col]).date()) if entry_col else None,
-                        "exit_date": str(pd.to_datetime(r[exit_col]).date()) if exit_col else None,
-                        "trade_metric_name": ret_col,
-                        "trade_metric_value": float(r[ret_col]) if pd.notna(r[ret_col]) else None,
-                    }
-                )
+            order = trades.sort_values(entry_col).index if entry_col else trades.index
+            all_trades = [records[i] for i in order]
 
             # Highlights: best/worst 2 trades
-            t = trades.sort_values(ret_col)
-            sample = pd.concat([t.head(2), t.tail(2)], axis=0)
-            for _, r in sample.iterrows():
-                trade_highlights.append(
-                    {
-                        "entry_date": str(pd.to_datetime(r[entry_col]).date()) if entry_col else None,
-                        "exit_date": str(pd.to_datetime(r[exit_col]).date()) if exit_col else None,
-                        "trade_metric_name": ret_col,
-                        "trade_metric_value": float(r[ret_col]) if pd.notna(r[ret_col]) else None,
-                    }
-                )
+            by_ret = trades.sort_values(ret_col).index
+            trade_highlights = [records[i] for i in (*by_ret[:2], *by_ret[-2:])]
 
     evidence = {
         "ticker": ticker,
@@ -136,197 +146,235 @@ def build_evidence_pack(
     return evidence
 
 
-def _prompt_trade_note(evidence: Dict[str, Any]) -> str:
-    """Trade note prompt: force the model to ONLY use provided numbers."""
-    return f"""
-You are a buy-side technical analyst writing a client-ready trade note in Markdown.
-
-STRICT RULES:
-- Use ONLY the numbers and facts in the EVIDENCE JSON.
-- Do NOT invent missing values. If something is missing, write "Not available from provided evidence."
-- Do not claim you "saw" charts; you may only refer to chart filenames as pipeline outputs.
-- Be transparent about assumptions and limitations.
-- Do NOT use bold formatting (**text**) inside bullet points. Write all bullet point content as plain text.
-
-OUTPUT (use these headings exactly):
-# {evidence.get("ticker", "TICKER")} - Technical Trade Note
-## 1. Executive Summary
-## 2. Current Signal Snapshot
-## 3. Backtest Results (with transaction costs)
-## 4. Risk & Position Sizing Considerations
-## 5. Limitations & Next Steps
-
-EVIDENCE JSON:
-{json.dumps(evidence, indent=2, ensure_ascii=False)}
-""".strip()
-
+# Compact JSON in prompts: indentation is roughly a third of the evidence
+# bytes and the model parses either form. TECH_AGENT_DEBUG_PROMPT=1 restores
+# the indented layout for reading prompts by hand.
+_PROMPT_INDENT = os.environ.get("TECH_AGENT_DEBUG_PROMPT") == "1"
 
-def _prompt_full_report(evidence: Dict[str, Any]) -> str:
-    """
-    Full report prompt that generates detailed report matching the PDF template.
-    """
-    ticker = evidence.get("ticker", "TICKER")
-    metrics = evidence.get("metrics", {})
-    latest = evidence.get("latest_state", {})
-    window = evidence.get("backtest_window", {})
-    trades = evidence.get("trade_highlights", [])
 
-    return f"""
-You are a buy-side technical analyst writing a professional technical analysis report in Markdown.
+def _evidence_json(evidence: Dict[str, Any]) -> str:
+    """Evidence serialised for the prompt (NaN as null, numpy values encoded natively)."""
+    option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+    if _PROMPT_INDENT:
+        option |= orjson.OPT_INDENT_2
+    return orjson.dumps(evidence, option=option).decode("utf-8")
 
-CRITICAL RULES:
-- Use ONLY the numbers from EVIDENCE JSON below. Do NOT invent any numbers.
-- Follow the EXACT structure below with all sections and subsections.
-- Use bullet points for Backtest Setup, Interpretation, and Market Regimes sections.
-- Use tables where specified.
-- Include specific numbers from latest_state (close, MA20, MA50, MA200, MACD, MACD_Signal, RSI_14).
-- Do NOT use bold formatting (**text**) inside bullet points. Only use bold for the fixed labels in Backtest Setup section (e.g., **Ticker:**). All other bullet point text should be plain text without bold.
 
-REQUIRED STRUCTURE (follow exactly):
+# Prompt templates live next to this module and are read on first use;
+# only the ticker and evidence vary per call.
+_PROMPT_DIR = Path(__file__).parent / "prompts"
 
-## Backtest Setup & Assumptions
 
-- **Ticker:** {ticker}
-- **Backtest Period:** [use backtest_window.start] – [use backtest_window.end]
-- **Strategy Type:** Long/Flat
-- **Signal Execution:** Entry and exit signals are shifted by one day to avoid look-ahead bias.
-- **Transaction Costs:** 10 basis points applied per turnover (position change).
-- **Initial Equity:** 1.0 unit
-- **Final Equity:** [use metrics.EquityEnd] units
-- **Number of Trades:** [use metrics.NumTrades] discrete trades executed over the backtest window.
+@functools.lru_cache(maxsize=4)
+def _load_template(name: str) -> Template:
+    return Template((_PROMPT_DIR / name).read_text(encoding="utf-8").strip())
 
-## Performance Results
 
-| METRIC | VALUE |
-|--------|-------|
-| CAGR | [metrics.CAGR]% |
-| Sharpe Ratio | [metrics.Sharpe] |
-| Max Drawdown (Strategy) | [metrics.MaxDrawdown]% |
-| Max Drawdown (Buy-and-Hold) | [metrics.BuyHoldMaxDrawdown]% |
-| Hit Rate | [metrics.HitRate]% |
-| Equity Multiple | [metrics.EquityMultiple]x |
-| Buy-and-Hold Multiple | [metrics.BuyHoldMultiple]x |
+# Evidence keys each prompt never reads; dropped before serialisation so they
+# are not billed as input tokens. The trade note works from metrics and the
+# highlights, the full report's trade log is built from all_trades and the
+# PDF step inserts the charts itself.
+_TRADE_NOTE_UNUSED_KEYS = frozenset({"all_trades"})
+_FULL_REPORT_UNUSED_KEYS = frozenset({"trade_highlights", "charts"})
 
-## Interpretation
 
-Write 5 bullet points interpreting the performance metrics. Each bullet should:
-- Reference a specific metric with its value
-- Explain what it means for the strategy
-- Be factual and professional
+def _prune_evidence(evidence: Dict[str, Any], unused: frozenset) -> Dict[str, Any]:
+    return {k: v for k, v in evidence.items() if k not in unused}
 
-IMPORTANT interpretation guidelines:
 
-For Max Drawdown: Compare the strategy's Max Drawdown [metrics.MaxDrawdown] against the buy-and-hold benchmark drawdown [metrics.BuyHoldMaxDrawdown]. Explicitly contrast these values, quantify the magnitude of drawdown reduction (e.g., "reduced drawdown by X percentage points"), and interpret this improvement in the context of risk management and downside protection. Focus on peak-to-trough risk rather than return performance. Maintain academic, institutional tone.
-
-For Hit Rate: If the hit rate is low relative to trade frequency, explain the relationship between hit rate and payoff structure. A low hit rate combined with positive overall returns indicates that winning trades generate significantly larger gains than losing trades cost. Explain this as an intentional selectivity-payoff trade-off - the strategy prioritizes large gains on winning positions over trade frequency.
-
-## Behaviour Across Market Regimes
-
-### Regime Filtering (MA200)
-
-Write 3 bullet points about MA200 as regime filter. Include:
-- Current price vs MA200 comparison using latest_state values
-- How it prevented exposure during adverse periods
-
-### Trend Persistence (MA20 and MA50)
-
-Write 3 bullet points about MA20/MA50. Include:
-- Current MA20 and MA50 values from latest_state
-- How they enforce minimum exposure floor
+def _prompt_trade_note(evidence: Dict[str, Any]) -> str:
+    """Trade note prompt: force the model to ONLY use provided numbers."""
+    return _load_template("trade_note.md").substitute(
+        ticker=evidence.get("ticker", "TICKER"),
+        evidence_json=_evidence_json(_prune_evidence(evidence, _TRADE_NOTE_UNUSED_KEYS)),
+    )
 
-### Volatility Targeting
 
-Write 3 bullet points about volatility targeting and risk budgeting.
+def _prompt_full_report(evidence: Dict[str, Any]) -> str:
+    """
+    Full report prompt that generates detailed report matching the PDF template.
+    """
+    # Everything before the evidence is identical across tickers, so the
+    # API's automatic prompt caching can reuse the instruction prefix.
+    return _load_template("full_report.md").substitute(
+        evidence_json=_evidence_json(_prune_evidence(evidence, _FULL_REPORT_UNUSED_KEYS)),
+    )
 
-### Momentum Degradation (MACD)
 
-Write 3 bullet points about MACD. Include:
-- Current MACD and MACD_Signal values from latest_state
-- Whether MACD is above/below signal line
+# Output caps: decoding time grows with output length, and the templates ask
+# for roughly 500 (note) and 3000 (full report) tokens of Markdown.
+TRADE_NOTE_MAX_TOKENS = 900
+FULL_REPORT_MAX_TOKENS = 4500
 
-### Overextension Control (RSI)
 
-Write 3 bullet points about RSI. Include:
-- Current RSI_14 value from latest_state
-- Whether it's below/above overextension thresholds
+# Per-request timeout in seconds (the SDK default is 600s); a stalled
+# completion fails the run instead of hanging the hybrid controller.
+LLM_TIMEOUT_S = float(os.environ.get("TECH_AGENT_LLM_TIMEOUT", "300"))
 
-### Path-Dependent Risk Control (ATR and Trailing Stops)
+# Retries on 408/409/429/5xx and connection errors. The SDK applies
+# exponential backoff with jitter (honouring Retry-After), so three
+# attempts in total are made per call by default.
+LLM_MAX_RETRIES = int(os.environ.get("TECH_AGENT_LLM_RETRIES", "2"))
 
-Write 3 bullet points about ATR-based trailing stops and drawdown control.
 
-## Trade Log
+# One client per process so the HTTP connection pool (and its TLS sessions)
+# is shared by the trade note and full report calls.
+_client = None
+_client_lock = threading.Lock()
 
-| ENTRY DATE | EXIT DATE | TRADE RETURN (%) | NOTES |
-|------------|-----------|------------------|-------|
-[Create table rows from all_trades (NOT trade_highlights). Include ALL trades from the all_trades array.
 
-IMPORTANT for TRADE RETURN column formatting:
-- For POSITIVE returns: wrap the value in <span class="positive">+XX.XX%</span>
-- For NEGATIVE returns: wrap the value in <span class="negative">-XX.XX%</span>
-- Always include the + or - sign before the number
+def _get_client():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from openai import OpenAI  # imported lazily: only needed when an LLM call is made
+                _client = OpenAI()
+    return _client
 
-For each trade, add a brief note like "Strong momentum capture" for gains >50%, "Extended trend participation" for gains 10-50%, "Short-term momentum degradation" or "Quick exit on momentum loss" for losses]
 
-Write 3 bullet points analyzing the trade patterns across all trades.
+# Responses keyed on a digest of (model, max_tokens, prompt). Calls are made
+# at temperature 0, so re-running the same evidence in one process reuses
+# the earlier report instead of paying for another round trip.
+_RESPONSE_CACHE: OrderedDict[str, str] = OrderedDict()
+_RESPONSE_CACHE_SIZE = 32
+_response_cache_lock = threading.Lock()
 
-## Limitations & Future Extensions
 
-Write 4 bullet points about:
-- Conservative exposure vs buy-and-hold in bull markets
-- Low hit rate implications
-- Future improvements (adaptive parameters, ML classifiers)
+def _response_key(prompt: str, model: str, max_tokens: int) -> str:
+    return hashlib.blake2b(
+        f"{model}\0{max_tokens}\0{prompt}".encode("utf-8"), digest_size=16
+    ).hexdigest()
 
-## Conclusion
 
-Write one paragraph (4-5 sentences) summarizing:
-- The disciplined, risk-aware approach
-- Balance between capital preservation and regime participation
-- Why it's valuable for institutional investors
+def _cache_response(key: str, content: str) -> None:
+    with _response_cache_lock:
+        _RESPONSE_CACHE[key] = content
+        if len(_RESPONSE_CACHE) > _RESPONSE_CACHE_SIZE:
+            _RESPONSE_CACHE.popitem(last=False)
 
-EVIDENCE JSON:
-{json.dumps(evidence, indent=2, ensure_ascii=False)}
-""".strip()
 
+def _chat(prompt: str, model: str, max_tokens: int) -> str:
+    """Single-turn chat completion with an in-process response cache."""
+    key = _response_key(prompt, model, max_tokens)
+    with _response_cache_lock:
+        cached = _RESPONSE_CACHE.get(key)
+        if cached is not None:
+            _RESPONSE_CACHE.move_to_end(key)
+            return cached
 
-def llm_generate_trade_note(evidence: Dict[str, Any], model: str = "gpt-4o-mini") -> str:
+    client = _get_client().with_options(timeout=LLM_TIMEOUT_S, max_retries=LLM_MAX_RETRIES)
+    resp = client.chat.completions.create(
+        model=model,
+        messages=[{"role": "user", "content": prompt}],
+        temperature=0,
+        max_tokens=max_tokens,
+    )
+    content = resp.choices[0].message.content
+    if content is not None:
+        _cache_response(key, content)
+    return content
+
+
+def _chat_stream(prompt: str, model: str, max_tokens: int) -> Iterator[str]:
+    """Streaming counterpart of _chat; the joined text is cached on completion."""
+    key = _response_key(prompt, model, max_tokens)
+    with _response_cache_lock:
+        cached = _RESPONSE_CACHE.get(key)
+    if cached is not None:
+        yield cached
+        return
+
+    client = _get_client().with_options(timeout=LLM_TIMEOUT_S, max_retries=LLM_MAX_RETRIES)
+    stream = client.chat.completions.create(
+        model=model,
+        messages=[{"role": "user", "content": prompt}],
+        temperature=0,
+        max_tokens=max_tokens,
+        stream=True,
+    )
+    parts: List[str] = []
+    for chunk in stream:
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content
+        if delta:
+            parts.append(delta)
+            yield delta
+    _cache_response(key, "".join(parts))
+
+
+def llm_generate_trade_note(
+    evidence: Dict[str, Any],
+    model: str = "gpt-4o-mini",
+    max_tokens: int = TRADE_NOTE_MAX_TOKENS,
+) -> str:
     """
     Generate a short trade note using OpenAI Chat Completions API.
 
     Args:
         evidence: Structured evidence pack with metrics and latest state.
         model: OpenAI model identifier (default: gpt-4o-mini).
+        max_tokens: Cap on generated tokens; bounds latency and cost.
 
     Returns:
         Markdown-formatted trade note.
     """
-    client = OpenAI()
-    prompt = _prompt_trade_note(evidence)
-    resp = client.chat.completions.create(
-        model=model,
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0,
-        max_tokens=900,
-    )
-    return resp.choices[0].message.content
+    return _chat(_prompt_trade_note(evidence), model, max_tokens=max_tokens)
 
 
-def llm_generate_full_report(evidence: Dict[str, Any], model: str = "gpt-4o-mini") -> str:
+def llm_generate_full_report(
+    evidence: Dict[str, Any],
+    model: str = "gpt-4o-mini",
+    max_tokens: int = FULL_REPORT_MAX_TOKENS,
+) -> str:
     """
     Generate a full technical analysis report using OpenAI Chat Completions API.
 
     Args:
         evidence: Structured evidence pack with metrics, latest state, and trade highlights.
         model: OpenAI model identifier (default: gpt-4o-mini).
+        max_tokens: Cap on generated tokens; bounds latency and cost.
 
     Returns:
         Markdown-formatted full report matching the PDF template structure.
     """
-    client = OpenAI()
-    prompt = _prompt_full_report(evidence)
-    resp = client.chat.completions.create(
-        model=model,
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0,
-        max_tokens=4500,
-    )
-    return resp.choices[0].message.content
\ No newline at end of file
+    return _chat(_prompt_full_report(evidence), model, max_tokens=max_tokens)
+
+
+def llm_stream_full_report(
+    evidence: Dict[str, Any],
+    model: str = "gpt-4o-mini",
+    max_tokens: int = FULL_REPORT_MAX_TOKENS,
+) -> Iterator[str]:
+    """
+    Stream the full report as it is generated.
+
+    Yields Markdown text fragments; "".join() of them equals what
+    llm_generate_full_report returns, so callers can print or write
+    incrementally without waiting for the whole completion.
+    """
+    return _chat_stream(_prompt_full_report(evidence), model, max_tokens=max_tokens)
+
+
+def llm_generate_reports(
+    evidence: Dict[str, Any],
+    model: str = "gpt-4o-mini",
+    max_tokens: int = FULL_REPORT_MAX_TOKENS,
+) -> Tuple[str, str]:
+    """
+    Generate the trade note and the full report concurrently.
+
+    The two requests are independent, so they are issued from two worker
+    threads over the shared client; wall time is roughly that of the
+    longer (full report) call instead of the sum of both.
+
+    max_tokens caps the full report; the trade note keeps its own cap.
+
+    Returns:
+        (trade_note, full_report) Markdown strings.
+    """
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        note = pool.submit(llm_generate_trade_note, evidence, model)
+        report = pool.submit(llm_generate_full_report, evidence, model, max_tokens)
+        return note.result(), report.result()
@@ -8,12 +8,39 @@ in appropriate sections while preserving the original MD structure.
 from __future__ import annotations
 
 import base64
+import functools
+import os
 from pathlib import Path
 from typing import Dict, Any, Optional
 import markdown
 import re
 
 
+# <img> tag and attribute patterns used when embedding chart images
+_IMG_TAG_RE = re.compile(r'<img[^>]+/?>')
+_IMG_SRC_RE = re.compile(r'src="([^"]*)"')
+_IMG_ALT_RE = re.compile(r'alt="([^"]*)"')
+
+# Chart references the LLM sometimes writes itself; replaced by our own charts.
+# One alternation so both are stripped in a single scan; without any file
+# references a trailing "Charts & Visuals" section is cut with a slice.
+_STALE_CHART_REFS_RE = re.compile(r'\(Refer to attached files:[\s\S]*?\)|## Charts & Visuals[\s\S]*$')
+_STALE_CHARTS_HEADING = '## Charts & Visuals'
+
+# Report sections that receive charts, found in one scan. The boundary is a
+# lookahead so a match never consumes the next section's heading.
+_CHART_SECTIONS_RE = re.compile(r'## (Backtest Setup|Performance).*?(?=\n## |\n---|\Z)', re.DOTALL | re.IGNORECASE)
+
+# HTML post-processing
+# <p> wrappers markdown puts around chart containers (open or close side)
+_CHART_P_WRAP_RE = re.compile(r'<p>\s*(<div class="chart-container">)|(</div>)\s*</p>')
+_H1_RE = re.compile(r'<h1>[^<]*</h1>')
+
+# Stand-in for embedded data URIs while the HTML is post-processed; the
+# base64 payloads (hundreds of KB) are spliced in last so no regex pass
+# has to scan them. NUL never occurs in markdown output.
+_DATA_URI_SLOT = '\x00data-uri\x00'
+
 def _get_css_styles() -> str:
     """Return professional CSS styles matching institutional investment memo design."""
     return """
@@ -231,12 +258,10 @@ hr {
 """
 
 
-def _embed_image_as_base64(image_path: Path) -> str:
-    """Convert image file to base64 data URI."""
-    if not image_path.exists():
-        return ""
-
-    suffix = image_path.suffix.lower()
+@functools.lru_cache(maxsize=32)
+def _data_uri_cached(path: str, mtime: float) -> str:
+    """Build the data URI; keyed on mtime so a regenerated chart is re-read."""
+    suffix = Path(path).suffix.lower()
     mime_types = {
         '.png': 'image/png',
         '.jpg': 'image/jpeg',
@@ -244,12 +269,21 @@ def _embed_image_as_base64(image_path: Path) -> str:
     }
     mime_type = mime_types.get(suffix, 'image/png')
 
-    with open(image_path, 'rb') as f:
+    with open(path, 'rb') as f:
         data = base64.b64encode(f.read()).decode('utf-8')
 
     return f"data:{mime_type};base64,{data}"
 
 
+def _embed_image_as_base64(image_path: Path) -> str:
+    """Convert image file to base64 data URI."""
+    try:
+        mtime = os.stat(image_path).st_mtime
+    except OSError:
+        return ""
+    return _data_uri_cached(str(image_path), mtime)
+
+
 def _make_chart_html(image_path: Path, caption: str) -> str:
     """Create HTML for a single chart."""
     if not image_path.exists():
@@ -264,106 +298,22 @@ def _make_chart_html(image_path: Path, caption: str) -> str:
 '''
 
 
-def _insert_charts_into_markdown(
-    markdown_content: str,
-    chart_paths: Dict[str, str],
-    base_path: Path,
-) -> str:
-    """
-    Insert charts into appropriate sections of the markdown.
-    Charts are placed after relevant sections.
-    """
-    if not chart_paths:
-        return markdown_content
-
-    # Remove old chart references
-    markdown_content = re.sub(
-        r'\(Refer to attached files:[\s\S]*?\)',
-        '',
-        markdown_content
-    )
-    markdown_content = re.sub(
-        r'## Charts & Visuals[\s\S]*$',
-        '',
-        markdown_content
-    )
+def _resolve_image_path(src: str, base_path: Path) -> Optional[Path]:
+    """Locate a chart file given as absolute, base-relative or bare filename."""
+    img_path = Path(src)
+    if not img_path.is_absolute():
+        img_path = base_path / src
+    if img_path.exists():
+        return img_path
+    # Bare filenames were already tried as base_path / src above
+    if '/' not in src and '\\' not in src:
+        return None
+    img_path = base_path / img_path.name
+    return img_path if img_path.exists() else None
 
-    # Define where to insert each chart
-    # Format: (section_pattern, chart_keys, captions, descriptions)
-    # Only 3 charts as per technical agent spec:
-    # 1. Trade Entry & Exit (golden_cross_trades) - MA200 regime gate
-    # 2. Equity + Drawdown comparison (equity_drawdown) - performance comparison
-    # 3. Price + MA + MACD 6m (price_ma_macd_6m) - short-horizon diagnostic
-
-    chart_insertions = [
-        # After Backtest Setup - show Trade Entry & Exit FIRST (explains HOW strategy works)
-        (r'(## Backtest Setup.*?)(\n## |\n---|\Z)',
-         ['golden_cross_trades'],
-         ['Trade Entry & Exit Points'],
-         ['''The figure shows the MA200-based regime gate over the full sample period. The blue line represents daily closing price, the orange line shows MA50, and the green line shows MA200 which defines the regime boundary. Golden Cross (blue triangles) and Death Cross (orange triangles) mark regime transitions. Green dots indicate trade entries, red crosses indicate exits. The sparse distribution of trades demonstrates that MA200 is used as a low-frequency structural filter, not a short-term timing signal.''']),
-
-        # After Performance Results - show equity + drawdown comparison
-        (r'(## Performance.*?)(\n## |\n---|\Z)',
-         ['equity_drawdown'],
-         ['Strategy vs Buy-and-Hold Comparison'],
-         ['''The upper panel shows log-scaled equity curves normalised to a common starting value. The buy-and-hold trajectory reflects full market exposure, while the strategy curve reflects conditional exposure governed by the regime gate. Flatter segments correspond to periods when the regime gate is closed and capital is preserved. The lower panel reports drawdown profiles - the strategy exhibits materially shallower drawdowns, indicating improved downside control.''']),
-    ]
-
-    # Charts that go to Appendix - only 6-month MACD
-    appendix_charts = [
-        ('price_ma_macd_6m', 'Price with Moving Averages & MACD (6 Months)',
-         '''This short-horizon diagnostic view shows recent price dynamics using candlestick charts, moving averages, and MACD. The upper panel displays price action with MA20 (blue), MA50 (orange), and MA200 (green). The lower panel shows MACD line, signal line, and histogram for momentum analysis. A six-month horizon is selected to preserve visual interpretability.'''),
-    ]
-
-    for pattern, chart_keys, captions, descriptions in chart_insertions:
-        match = re.search(pattern, markdown_content, re.DOTALL | re.IGNORECASE)
-        if match:
-            section_content = match.group(1)
-            next_section = match.group(2)
-
-            charts_html = ""
-            for chart_key, caption, description in zip(chart_keys, captions, descriptions):
-                path_str = chart_paths.get(chart_key)
-                if path_str:
-                    img_path = Path(path_str)
-                    if not img_path.is_absolute():
-                        img_path = base_path / path_str
-                    if not img_path.exists():
-                        img_path = base_path / img_path.name
-
-                    if img_path.exists():
-                        charts_html += f"\n\n### {caption}\n\n"
-                        charts_html += f"![{caption}]({img_path})\n\n"
-                        charts_html += f"{description}\n"
-
-            if charts_html:
-                new_content = section_content + charts_html + next_section
-                markdown_content = markdown_content[:match.start()] + new_content + markdown_content[match.end():]
 
-    # Add Appendix with supplementary charts
-    appendix_images = []
-    for chart_key, caption, description in appendix_charts:
-        path_str = chart_paths.get(chart_key)
-        if path_str:
-            img_path = Path(path_str)
-            if not img_path.is_absolute():
-                img_path = base_path / path_str
-            if not img_path.exists():
-                img_path = base_path / img_path.name
-            if img_path.exists():
-                appendix_images.append((caption, img_path, description))
-
-    if appendix_images:
-        # Use HTML directly to keep header and chart together
-        markdown_content += "\n\n---\n\n<div class='chart-section'>\n\n## Strategy Charts\n\n"
-        for caption, img_path, description in appendix_images:
-            markdown_content += f"![{caption}]({img_path})\n\n"
-            markdown_content += f"*{caption}*\n\n"
-            markdown_content += f"{description}\n"
-        markdown_content += "\n</div>\n"
-
-    # Add Appendix: Strategy Parameters
-    markdown_content += """
+# Fixed appendix appended to every technical report
+_STRATEGY_PARAMS_APPENDIX = """
 
 ---
 
@@ -390,34 +340,142 @@ Technical strategy rules and risk management parameters.
 
 """
 
-    return markdown_content
+
+# Where to insert each chart
+# Format: (section heading, chart_keys, captions, descriptions)
+# Only 3 charts as per technical agent spec:
+# 1. Trade Entry & Exit (golden_cross_trades) - MA200 regime gate
+# 2. Equity + Drawdown comparison (equity_drawdown) - performance comparison
+# 3. Price + MA + MACD 6m (price_ma_macd_6m) - short-horizon diagnostic
+
+_CHART_INSERTIONS = (
+    # After Backtest Setup - show Trade Entry & Exit FIRST (explains HOW strategy works)
+    ('backtest setup',
+     ('golden_cross_trades',),
+     ('Trade Entry & Exit Points',),
+     ('''The figure shows the MA200-based regime gate over the full sample period. The blue line represents daily closing price, the orange line shows MA50, and the green line shows MA200 which defines the regime boundary. Golden Cross (blue triangles) and Death Cross (orange triangles) mark regime transitions. Green dots indicate trade entries, red crosses indicate exits. The sparse distribution of trades demonstrates that MA200 is used as a low-frequency structural filter, not a short-term timing signal.''',)),
+
+    # After Performance Results - show equity + drawdown comparison
+    ('performance',
+     ('equity_drawdown',),
+     ('Strategy vs Buy-and-Hold Comparison',),
+     ('''The upper panel shows log-scaled equity curves normalised to a common starting value. The buy-and-hold trajectory reflects full market exposure, while the strategy curve reflects conditional exposure governed by the regime gate. Flatter segments correspond to periods when the regime gate is closed and capital is preserved. The lower panel reports drawdown profiles - the strategy exhibits materially shallower drawdowns, indicating improved downside control.''',)),
+)
+
+# Charts that go to Appendix - only 6-month MACD
+_APPENDIX_CHARTS = (
+    ('price_ma_macd_6m', 'Price with Moving Averages & MACD (6 Months)',
+     '''This short-horizon diagnostic view shows recent price dynamics using candlestick charts, moving averages, and MACD. The upper panel displays price action with MA20 (blue), MA50 (orange), and MA200 (green). The lower panel shows MACD line, signal line, and histogram for momentum analysis. A six-month horizon is selected to preserve visual interpretability.'''),
+)
+
+
+def _insert_charts_into_markdown(
+    markdown_content: str,
+    chart_paths: Dict[str, str],
+    base_path: Path,
+) -> str:
+    """
+    Insert charts into appropriate sections of the markdown.
+    Charts are placed after relevant sections.
+    """
+    if not chart_paths:
+        return markdown_content
+
+    # Remove old chart references (most reports have none; skip the regex then)
+    if '(Refer to attached files:' in markdown_content:
+        markdown_content = _STALE_CHART_REFS_RE.sub('', markdown_content)
+    else:
+        cut = markdown_content.find(_STALE_CHARTS_HEADING)
+        if cut != -1:
+            markdown_content = markdown_content[:cut]
+
+    # Chart markdown per section, skipping sections none of whose charts exist
+    section_charts = {}
+    for section, chart_keys, captions, descriptions in _CHART_INSERTIONS:
+        chart_parts = []
+        for chart_key, caption, description in zip(chart_keys, captions, descriptions):
+            path_str = chart_paths.get(chart_key)
+            img_path = _resolve_image_path(path_str, base_path) if path_str else None
+            if img_path is not None:
+                chart_parts.append(
+                    f"\n\n### {caption}\n\n![{caption}]({img_path})\n\n{description}\n"
+                )
+        if chart_parts:
+            section_charts[section] = "".join(chart_parts)
+
+    if section_charts:
+        # First end offset of each target section, from a single scan
+        section_ends = {}
+        for match in _CHART_SECTIONS_RE.finditer(markdown_content):
+            section_ends.setdefault(match.group(1).lower(), match.end())
+            if len(section_ends) == len(_CHART_INSERTIONS):
+                break
+
+        inserts = sorted(
+            (end, section_charts[section])
+            for section, end in section_ends.items() if section in section_charts
+        )
+        if inserts:
+            pieces = []
+            prev = 0
+            for end, charts in inserts:
+                pieces.append(markdown_content[prev:end])
+                pieces.append(charts)
+                prev = end
+            pieces.append(markdown_content[prev:])
+            markdown_content = "".join(pieces)
+
+    # Add Appendix with supplementary charts
+    appendix_images = []
+    for chart_key, caption, description in _APPENDIX_CHARTS:
+        path_str = chart_paths.get(chart_key)
+        img_path = _resolve_image_path(path_str, base_path) if path_str else None
+        if img_path is not None:
+            appendix_images.append((caption, img_path, description))
+
+    # Build the appended sections as parts and join once at the end
+    parts = [markdown_content]
+    if appendix_images:
+        # Use HTML directly to keep header and chart together
+        parts.append("\n\n---\n\n<div class='chart-section'>\n\n## Strategy Charts\n\n")
+        for caption, img_path, description in appendix_images:
+            parts.append(f"![{caption}]({img_path})\n\n*{caption}*\n\n{description}\n")
+        parts.append("\n</div>\n")
+
+    # Add Appendix: Strategy Parameters
+    parts.append(_STRATEGY_PARAMS_APPENDIX)
+
+    return "".join(parts)
 
 
 def _convert_md_images_to_embedded(html_content: str, base_path: Path) -> str:
     """Convert image references in HTML to embedded base64."""
+    if '<img' not in html_content:
+        return html_content
+
+    # Defer the payloads unless the slot marker could collide with the content
+    data_uris = [] if _DATA_URI_SLOT not in html_content else None
 
     def replace_img_tag(match):
         full_tag = match.group(0)
 
-        # Extract src and alt from the tag (order-independent)
-        src_match = re.search(r'src="([^"]*)"', full_tag)
-        alt_match = re.search(r'alt="([^"]*)"', full_tag)
-
+        # Extract src and alt from the tag (order-independent); alt is only
+        # needed once the image is known to resolve
+        src_match = _IMG_SRC_RE.search(full_tag)
         src = src_match.group(1) if src_match else ""
-        alt = alt_match.group(1) if alt_match else ""
 
         if not src:
             return full_tag
 
         # Try to find the image
-        img_path = Path(src)
-        if not img_path.is_absolute():
-            img_path = base_path / src
-        if not img_path.exists():
-            img_path = base_path / img_path.name
-
-        if img_path.exists():
+        img_path = _resolve_image_path(src, base_path)
+        if img_path is not None:
+            alt_match = _IMG_ALT_RE.search(full_tag)
+            alt = alt_match.group(1) if alt_match else ""
             data_uri = _embed_image_as_base64(img_path)
+            if data_uris is not None:
+                data_uris.append(data_uri)
+                data_uri = _DATA_URI_SLOT
             return f'''<div class="chart-container">
     <img src="{data_uri}" alt="{alt}">
     <div class="chart-caption">{alt}</div>
@@ -426,25 +484,21 @@ def _convert_md_images_to_embedded(html_content: str, base_path: Path) -> str:
         return full_tag
 
     # Match any <img> tag (regardless of attribute order)
-    html_content = re.sub(
-        r'<img[^>]+/?>',
-        replace_img_tag,
-        html_content
-    )
+    html_content = _IMG_TAG_RE.sub(replace_img_tag, html_content)
 
     # Remove wrapping <p> tags around chart containers
-    html_content = re.sub(
-        r'<p>\s*(<div class="chart-container">)',
-        r'\1',
-        html_content
-    )
-    html_content = re.sub(
-        r'(</div>)\s*</p>',
-        r'\1',
-        html_content
-    )
+    html_content = _CHART_P_WRAP_RE.sub(r'\1\2', html_content)
+
+    if not data_uris:
+        return html_content
 
-    return html_content
+    # Splice the deferred payloads into their slots in one join
+    pieces = html_content.split(_DATA_URI_SLOT)
+    out = [pieces[0]]
+    for data_uri, piece in zip(data_uris, pieces[1:]):
+        out.append(data_uri)
+        out.append(piece)
+    return "".join(out)
 
 
 def _build_html_report(
@@ -470,6 +524,11 @@ def _build_html_report(
     md = markdown.Markdown(extensions=['tables', 'fenced_code'])
     html_body = md.convert(markdown_content.strip())
 
+    # Remove the original H1 from markdown (we'll add our own header); done
+    # before embedding so the scan never walks the base64 image data
+    if '<h1>' in html_body:
+        html_body = _H1_RE.sub('', html_body, count=1)
+
     # Embed images as base64
     html_body = _convert_md_images_to_embedded(html_body, base_path)
 
@@ -485,9 +544,6 @@ def _build_html_report(
         </div>
         """
 
-    # Remove the original H1 from markdown (we'll add our own header)
-    html_body = re.sub(r'<h1>[^<]*</h1>', '', html_body, count=1)
-
     # Use company name if provided, otherwise use ticker
     display_name = company_name if company_name else ticker
 
@@ -0,0 +1,56 @@
+"""
+Fused EMA / MACD kernels.
+
+Optional Numba acceleration for the adjust=False EMA recurrence
+y[i] = a * x[i] + (1 - a) * y[i-1], seeded with y[0] = x[0] (same as
+pandas ewm(span=..., adjust=False)). When Numba is not installed,
+HAS_NUMBA is False and callers should keep using pandas.
+"""
+from __future__ import annotations
+
+import numpy as np
+
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+
+def _alpha(span: int) -> float:
+    return 2.0 / (span + 1.0)
+
+
+if HAS_NUMBA:
+
+    @njit(cache=True)
+    def _macd_kernel(x, a_f, a_s, a_sig):
+        n = x.shape[0]
+        macd = np.empty(n)
+        sig = np.empty(n)
+        hist = np.empty(n)
+        if n == 0:
+            return macd, sig, hist
+
+        b_f = 1.0 - a_f
+        b_s = 1.0 - a_s
+        b_sig = 1.0 - a_sig
+        ef = x[0]
+        es = x[0]
+        macd[0] = 0.0
+        sig[0] = 0.0
+        hist[0] = 0.0
+        for i in range(1, n):
+            ef = a_f * x[i] + b_f * ef
+            es = a_s * x[i] + b_s * es
+            m = ef - es
+            macd[i] = m
+            sig[i] = a_sig * m + b_sig * sig[i - 1]
+            hist[i] = m - sig[i]
+        return macd, sig, hist
+
+
+def macd_arrays(x: np.ndarray, fast: int = 12, slow: int = 26, signal: int = 9):
+    """MACD line, signal and histogram in one pass. Requires HAS_NUMBA and NaN-free input."""
+    x = np.ascontiguousarray(x, dtype=np.float64)
+    return _macd_kernel(x, _alpha(fast), _alpha(slow), _alpha(signal))
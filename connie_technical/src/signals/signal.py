@@ -80,21 +80,34 @@ def _require_cols(df: pd.DataFrame, cols: set[str]) -> None:
         raise ValueError(f"Missing required columns for build_signals: {missing}")
 
 
+def _as_float(s: pd.Series) -> pd.Series:
+    """Return s as float64, skipping the copy when it already is."""
+    return s if s.dtype == np.float64 else s.astype(np.float64)
+
+
+def _safe_div(num, den: pd.Series) -> np.ndarray:
+    """num / den with NaN wherever den == 0 (no temporary copy of den)."""
+    d = den.to_numpy(dtype=np.float64)
+    n = num.to_numpy(dtype=np.float64) if isinstance(num, pd.Series) else num
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(d != 0.0, n / d, np.nan)
+
+
 def _compute_atr(df: pd.DataFrame, window: int = 14) -> pd.Series:
     if not {"High", "Low", "Close"}.issubset(df.columns):
         return pd.Series(np.nan, index=df.index, name="ATR")
 
-    high = df["High"].astype(float)
-    low = df["Low"].astype(float)
-    close = df["Close"].astype(float)
-    prev_close = close.shift(1)
+    high = df["High"].to_numpy(dtype=np.float64)
+    low = df["Low"].to_numpy(dtype=np.float64)
+    close = df["Close"].to_numpy(dtype=np.float64)
+    prev_close = np.empty_like(close)
+    prev_close[:1] = np.nan
+    prev_close[1:] = close[:-1]
 
-    tr = pd.concat(
-        [(high - low).abs(), (high - prev_close).abs(), (low - prev_close).abs()],
-        axis=1,
-    ).max(axis=1)
+    # True range; fmax skips NaN like DataFrame.max(axis=1) does on the first row
+    tr = np.fmax(np.abs(high - low), np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
 
-    return tr.rolling(window=window, min_periods=window).mean().rename("ATR")
+    return pd.Series(tr, index=df.index).rolling(window=window, min_periods=window).mean().rename("ATR")
 
 
 def build_signals(df: pd.DataFrame, cfg: SignalConfig = SignalConfig()) -> pd.DataFrame:
@@ -130,18 +143,18 @@ def build_signals(df: pd.DataFrame, cfg: SignalConfig = SignalConfig()) -> pd.Da
 
     out = df.copy()
 
-    close = out["Close"].astype(float)
-    ma20 = out["MA20"].astype(float)
-    ma50 = out["MA50"].astype(float)
-    ma200 = out["MA200"].astype(float)
-    rsi = out["RSI_14"].astype(float)
-    macd = out["MACD"].astype(float)
-    macd_sig = out["MACD_Signal"].astype(float)
+    close = _as_float(out["Close"])
+    ma20 = _as_float(out["MA20"])
+    ma50 = _as_float(out["MA50"])
+    ma200 = _as_float(out["MA200"])
+    rsi = _as_float(out["RSI_14"])
+    macd = _as_float(out["MACD"])
+    macd_sig = _as_float(out["MACD_Signal"])
 
     # ATR + ATR%
     atr = _compute_atr(out, window=cfg.atr_window)
     out["ATR"] = atr
-    out["ATR_PCT"] = (atr / close.replace(0, np.nan)).rename("ATR_PCT")
+    out["ATR_PCT"] = _safe_div(atr, close)
 
     # Regime / trend
     regime_ok = (close > ma200) if cfg.use_regime_ma200 else pd.Series(True, index=out.index)
@@ -150,8 +163,9 @@ def build_signals(df: pd.DataFrame, cfg: SignalConfig = SignalConfig()) -> pd.Da
 
     # Entry/exit events (event signals only; sizing handled by weight)
     entry_raw = regime_ok
-    prev = entry_raw.shift(1, fill_value=False).astype(bool)
-    entry = entry_raw.astype(bool) & (~prev)
+    regime_np = entry_raw.to_numpy(dtype=bool)
+    entry_np = regime_np.copy()
+    entry_np[1:] &= ~regime_np[:-1]
 
     exit_event = ~regime_ok  # regime break
 
@@ -161,37 +175,40 @@ def build_signals(df: pd.DataFrame, cfg: SignalConfig = SignalConfig()) -> pd.Da
         vol = ret.rolling(cfg.vol_window, min_periods=cfg.vol_window).std()
 
         target_daily_vol = float(cfg.target_annual_vol) / np.sqrt(252.0)
-        base_w = (target_daily_vol / vol.replace(0, np.nan)).clip(
+        base_w = pd.Series(_safe_div(target_daily_vol, vol), index=out.index).clip(
             lower=float(cfg.min_weight), upper=float(cfg.max_weight)
         ).fillna(0.0)
     else:
         base_w = pd.Series(float(cfg.max_weight), index=out.index)
 
-    # Enforce exposure floor in bull trend regime
-    w = base_w.copy()
+    # Weight adjustments run on ndarrays (no index alignment per step)
+    w = base_w.to_numpy(dtype=np.float64, copy=True)
+    bull = bull_trend.to_numpy(dtype=bool)
+    regime = regime_ok.to_numpy(dtype=bool)
 
     # Apply a floor in bull trend regime (no leverage, so cap at 1.0)
     floor = float(cfg.regime_trend_floor)
-    w = w.where(~bull_trend, np.maximum(w, floor))
+    np.maximum(w, floor, out=w, where=bull)
 
     # Outside bull trend but still above MA200, keep some exposure (softly reduced)
-    w = w.where(bull_trend | (~regime_ok), w * float(cfg.weak_trend_scale))
+    w[~bull & regime] *= float(cfg.weak_trend_scale)
 
     # If regime is off -> 0 exposure
-    w = w.where(regime_ok, 0.0)
+    w[~regime] = 0.0
 
     # Soft de-risk scaling
     # Momentum: MACD bearish -> reduce
-    w = w * np.where(macd >= macd_sig, 1.0, float(cfg.bearish_momentum_scale))
+    w[~(macd.to_numpy() >= macd_sig.to_numpy())] *= float(cfg.bearish_momentum_scale)
 
     # RSI hot -> reduce (avoid chasing)
-    w = w * np.where((rsi >= float(cfg.rsi_hot_1)) & (rsi < float(cfg.rsi_hot_2)), float(cfg.rsi_scale_hot_1), 1.0)
-    w = w * np.where(rsi >= float(cfg.rsi_hot_2), float(cfg.rsi_scale_hot_2), 1.0)
+    rsi_np = rsi.to_numpy()
+    w[(rsi_np >= float(cfg.rsi_hot_1)) & (rsi_np < float(cfg.rsi_hot_2))] *= float(cfg.rsi_scale_hot_1)
+    w[rsi_np >= float(cfg.rsi_hot_2)] *= float(cfg.rsi_scale_hot_2)
 
     # ATR% extreme vol -> reduce weight (optional)
     if cfg.atr_pct_max is not None and out["ATR_PCT"].notna().any():
-        too_hot = out["ATR_PCT"] >= float(cfg.atr_pct_max)
-        w = w * np.where(too_hot, float(cfg.atr_high_scale), 1.0)
+        too_hot = out["ATR_PCT"].to_numpy() >= float(cfg.atr_pct_max)
+        w[too_hot] *= float(cfg.atr_high_scale)
 
     out["weight"] = pd.Series(w, index=out.index).clip(0.0, 1.0).fillna(0.0)
 
@@ -204,10 +221,21 @@ def build_signals(df: pd.DataFrame, cfg: SignalConfig = SignalConfig()) -> pd.Da
     state = 0
     cooldown_left = 0
 
-    for i, (_dt, row) in enumerate(out.iterrows()):
-        c = float(row["Close"])
-        e = bool(entry.iloc[i])
-        x_event = bool(exit_event.iloc[i])
+    # Loop-invariant config scalars, converted once
+    stop_loss = -float(cfg.stop_loss_pct)
+    take_profit = float(cfg.take_profit_pct) if cfg.take_profit_pct is not None else None
+    trail_mult = float(cfg.atr_trail_mult)
+    trail_replaces_fixed = cfg.use_atr_trailing_stop and cfg.atr_trail_replaces_fixed_stop
+    cooldown_days = int(cfg.cooldown_days)
+
+    close_np = close.to_numpy()
+    atr_np = out["ATR"].to_numpy(dtype=np.float64)
+    exit_event_np = exit_event.to_numpy(dtype=bool)
+
+    for i in range(len(out)):
+        c = float(close_np[i])
+        e = bool(entry_np[i])
+        x_event = bool(exit_event_np[i])
 
         if cooldown_left > 0:
             cooldown_left -= 1
@@ -218,28 +246,24 @@ def build_signals(df: pd.DataFrame, cfg: SignalConfig = SignalConfig()) -> pd.Da
                 entry_price = c
                 highest_close = c
             pos_hint[i] = state
-            exit_sig[i] = False
             continue
 
         if entry_price is None:
             raise RuntimeError("entry_price is None while in position - this indicates a logic error")
         highest_close = max(highest_close, c) if highest_close is not None else c
 
-        stop_hit = (c / entry_price - 1.0) <= (-float(cfg.stop_loss_pct))
-        tp_hit = (
-            (c / entry_price - 1.0) >= float(cfg.take_profit_pct)
-            if cfg.take_profit_pct is not None
-            else False
-        )
+        pnl = c / entry_price - 1.0
+        stop_hit = pnl <= stop_loss
+        tp_hit = pnl >= take_profit if take_profit is not None else False
 
         trail_hit = False
         if cfg.use_atr_trailing_stop:
-            atr_i = float(row["ATR"]) if pd.notna(row.get("ATR", np.nan)) else np.nan
+            atr_i = float(atr_np[i])
             if np.isfinite(atr_i) and highest_close is not None:
-                stop_level = highest_close - float(cfg.atr_trail_mult) * atr_i
+                stop_level = highest_close - trail_mult * atr_i
                 trail_hit = c < stop_level
 
-        if cfg.use_atr_trailing_stop and cfg.atr_trail_replaces_fixed_stop:
+        if trail_replaces_fixed:
             risk_exit = trail_hit or tp_hit
         else:
             risk_exit = stop_hit or trail_hit or tp_hit
@@ -249,17 +273,15 @@ def build_signals(df: pd.DataFrame, cfg: SignalConfig = SignalConfig()) -> pd.Da
             state = 0
             entry_price = None
             highest_close = None
-            cooldown_left = int(cfg.cooldown_days)
-        else:
-            exit_sig[i] = False
+            cooldown_left = cooldown_days
 
         pos_hint[i] = state
 
-    out["entry"] = entry.fillna(False).astype(bool)
-    out["exit"] = pd.Series(exit_sig, index=out.index).fillna(False).astype(bool)
-    out["position_hint"] = pd.Series(pos_hint, index=out.index).astype(int)
+    out["entry"] = entry_np
+    out["exit"] = exit_sig
+    out["position_hint"] = pos_hint
 
-    out["entry_reason"] = np.where(out["entry"], "Regime ON (Close>MA200) + RouteA floor sizing", "")
-    out["exit_reason"] = np.where(out["exit"], "Regime OFF (Close<MA200) or risk exit (trail/stop/tp)", "")
+    out["entry_reason"] = np.where(entry_np, "Regime ON (Close>MA200) + RouteA floor sizing", "")
+    out["exit_reason"] = np.where(exit_sig, "Regime OFF (Close<MA200) or risk exit (trail/stop/tp)", "")
 
     return out
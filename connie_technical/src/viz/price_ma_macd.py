@@ -64,8 +64,7 @@ def plot_price_ma_macd(
             f"{[c for c in (macd_col, macd_signal_col) if c not in df.columns]}"
         )
 
-    d = df.copy()
-    d = d.sort_index()
+    d = df.sort_index()
 
     # Ensure numeric
     for c in ["Open", "High", "Low", "Close", macd_col, macd_signal_col]:
@@ -7,6 +7,7 @@ golden/death cross markers, and trade entry/exit points.
 from __future__ import annotations
 
 import os
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 
@@ -27,16 +28,18 @@ def plot_golden_cross_with_trades(
     """
     os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
 
-    dfx = df.copy().dropna(subset=[close_col, ma_fast, ma_slow])
+    dfx = df.dropna(subset=[close_col, ma_fast, ma_slow])
     if len(dfx) < 5:
         raise ValueError("Not enough data after dropping NaNs for golden cross plot.")
 
-    # Cross events
-    spread = dfx[ma_fast] - dfx[ma_slow]
-    prev = spread.shift(1)
+    # Cross events: +1 golden (MA50 crosses above MA200), -1 death (crosses below)
+    spread = (dfx[ma_fast] - dfx[ma_slow]).to_numpy(dtype=np.float64)
+    prev, cur = spread[:-1], spread[1:]
+    cross = np.zeros(len(spread), dtype=np.int8)
+    cross[1:] = np.where((prev <= 0) & (cur > 0), 1, np.where((prev >= 0) & (cur < 0), -1, 0))
 
-    golden = (prev <= 0) & (spread > 0)   # MA50 crosses above MA200
-    death = (prev >= 0) & (spread < 0)    # MA50 crosses below MA200
+    golden = cross == 1
+    death = cross == -1
 
     has_entry = entry_col in dfx.columns
     has_exit = exit_col in dfx.columns
@@ -9,6 +9,9 @@ import os
 import json
 import subprocess
 import shutil
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
 from typing import Dict, Any, Tuple, Optional
 from pathlib import Path
 
@@ -21,42 +24,96 @@ TECHNICAL_DIR = PROJECT_ROOT / "connie_technical"
 HYBRID_OUTPUT_DIR = HYBRID_DIR / "outputs"
 
 
-def run_fundamental_agent(ticker: str) -> Dict[str, Any]:
+def _run_agent(label: str, cmd: list, cwd: Path, log_path: Path) -> None:
+    """
+    Run an agent script, streaming its combined stdout/stderr to log_path.
+
+    The child runs with PYTHONUNBUFFERED so its prints reach the pipe (and
+    the log) line by line instead of in block-buffered bursts.
+
+    Raises:
+        RuntimeError: if the agent exits non-zero (message holds the last lines of output)
+    """
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    tail = deque(maxlen=50)
+
+    with open(log_path, 'wb', buffering=0) as log, subprocess.Popen(
+        cmd,
+        cwd=str(cwd),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        env={**os.environ, "PYTHONUNBUFFERED": "1"}
+    ) as proc:
+        for line in proc.stdout:
+            log.write(line)
+            tail.append(line)
+        returncode = proc.wait()
+
+    if returncode != 0:
+        output = b"".join(tail).decode('utf-8', errors='replace')
+        print(f"[{label}] OUTPUT (full log: {log_path}):\n{output}")
+        raise RuntimeError(f"{label.title()} agent failed: {output}")
+
+
+def _load_todays_fundamental_evidence(evidence_path: Path) -> Optional[Dict[str, Any]]:
+    """Return evidence written by a fundamental run earlier today, else None."""
+    try:
+        with open(evidence_path, 'r') as f:
+            evidence = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    today = datetime.now().strftime("%Y-%m-%d")
+    if evidence.get('meta', {}).get('analysis_date') != today:
+        return None
+    return evidence
+
+
+def run_fundamental_agent(ticker: str, force: bool = False) -> Dict[str, Any]:
     """
     Run fundamental analysis agent via subprocess.
 
+    Evidence produced earlier on the same day is reused instead of re-running
+    the agent; pass force=True to always run it.
+
     Returns:
         Parsed JSON evidence from fundamental agent
     """
-    print(f"\n[FUNDAMENTAL] Running analysis for {ticker}...")
-
-    result = subprocess.run(
-        ["python3", "run_demo.py", ticker],
-        cwd=str(FUNDAMENTAL_DIR),
-        capture_output=True,
-        text=True,
-        env=os.environ
-    )
+    evidence_path = FUNDAMENTAL_DIR / "outputs" / f"{ticker.upper()}_evidence.json"
 
-    if result.returncode != 0:
-        print(f"[FUNDAMENTAL] STDERR: {result.stderr}")
-        raise RuntimeError(f"Fundamental agent failed: {result.stderr}")
+    evidence = None if force else _load_todays_fundamental_evidence(evidence_path)
+    if evidence is not None:
+        print(f"\n[FUNDAMENTAL] Reusing today's analysis for {ticker}: {evidence_path}")
+    else:
+        print(f"\n[FUNDAMENTAL] Running analysis for {ticker}...")
 
-    # Read JSON evidence
-    evidence_path = FUNDAMENTAL_DIR / "outputs" / f"{ticker.upper()}_evidence.json"
-    if not evidence_path.exists():
-        raise FileNotFoundError(f"Fundamental evidence not found: {evidence_path}")
+        _run_agent(
+            "FUNDAMENTAL",
+            ["python3", "run_demo.py", ticker],
+            cwd=FUNDAMENTAL_DIR,
+            log_path=FUNDAMENTAL_DIR / "outputs" / f"{ticker.upper()}_run.log",
+        )
 
-    with open(evidence_path, 'r') as f:
-        evidence = json.load(f)
+        # Read JSON evidence
+        try:
+            with open(evidence_path, 'r') as f:
+                evidence = json.load(f)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Fundamental evidence not found: {evidence_path}") from None
 
-    print(f"[FUNDAMENTAL] Recommendation: {evidence['recommendation']['action']}")
-    print(f"[FUNDAMENTAL] Fair Value: ${evidence['recommendation']['fair_value']:.2f}")
-    print(f"[FUNDAMENTAL] Upside: {evidence['recommendation']['upside_downside']*100:+.1f}%")
+    rec = evidence['recommendation']
+    print(f"[FUNDAMENTAL] Recommendation: {rec['action']}")
+    print(f"[FUNDAMENTAL] Fair Value: ${rec['fair_value']:.2f}")
+    print(f"[FUNDAMENTAL] Upside: {rec['upside_downside']*100:+.1f}%")
 
     return evidence
 
 
+def _fmt_metric(value: Optional[float], spec: str) -> str:
+    """Format a backtest metric; undefined ones (e.g. Sharpe with zero volatility) are null."""
+    return "N/A" if value is None else format(value, spec)
+
+
 def run_technical_agent(ticker: str) -> Dict[str, Any]:
     """
     Run technical analysis agent via subprocess.
@@ -66,32 +123,27 @@ def run_technical_agent(ticker: str) -> Dict[str, Any]:
     """
     print(f"\n[TECHNICAL] Running analysis for {ticker}...")
 
-    result = subprocess.run(
+    _run_agent(
+        "TECHNICAL",
         ["python3", "run_demo.py", ticker, "--outdir", "outputs"],
-        cwd=str(TECHNICAL_DIR),
-        capture_output=True,
-        text=True,
-        env=os.environ
+        cwd=TECHNICAL_DIR,
+        log_path=TECHNICAL_DIR / "outputs" / f"{ticker.upper()}_run.log",
     )
 
-    if result.returncode != 0:
-        print(f"[TECHNICAL] STDERR: {result.stderr}")
-        raise RuntimeError(f"Technical agent failed: {result.stderr}")
-
     # Read JSON evidence
     evidence_path = TECHNICAL_DIR / "outputs" / f"{ticker.upper()}_evidence.json"
-    if not evidence_path.exists():
-        raise FileNotFoundError(f"Technical evidence not found: {evidence_path}")
-
-    with open(evidence_path, 'r') as f:
-        evidence = json.load(f)
+    try:
+        with open(evidence_path, 'r') as f:
+            evidence = json.load(f)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Technical evidence not found: {evidence_path}") from None
 
     metrics = evidence.get('metrics', {})
     latest = evidence.get('latest_state', {})
 
-    print(f"[TECHNICAL] CAGR: {metrics.get('CAGR', 0)*100:.1f}%")
-    print(f"[TECHNICAL] Sharpe: {metrics.get('Sharpe', 0):.2f}")
-    print(f"[TECHNICAL] Max DD: {metrics.get('MaxDrawdown', 0)*100:.1f}%")
+    print(f"[TECHNICAL] CAGR: {_fmt_metric(metrics.get('CAGR', 0), '.1%')}")
+    print(f"[TECHNICAL] Sharpe: {_fmt_metric(metrics.get('Sharpe', 0), '.2f')}")
+    print(f"[TECHNICAL] Max DD: {_fmt_metric(metrics.get('MaxDrawdown', 0), '.1%')}")
     print(f"[TECHNICAL] Regime: {'Bullish' if latest.get('regime_bullish') else 'Bearish'}")
 
     return evidence
@@ -104,9 +156,10 @@ def check_gate1(fundamental: Dict[str, Any]) -> Tuple[bool, str]:
     PASS if recommendation is BUY or HOLD
     FAIL if recommendation is SELL
     """
-    action = fundamental['recommendation']['action'].upper()
-    fair_value = fundamental['recommendation'].get('fair_value', 0)
-    upside = fundamental['recommendation'].get('upside_downside', 0) or 0
+    rec = fundamental['recommendation']
+    action = rec['action'].upper()
+    fair_value = rec.get('fair_value', 0)
+    upside = rec.get('upside_downside', 0) or 0
 
     if action in ["BUY", "HOLD"]:
         reason = f"{action} recommendation, {upside*100:+.1f}% upside to ${fair_value:.2f}"
@@ -171,6 +224,15 @@ def _convert_html_to_pdf(html_path: Path, pdf_path: Path) -> bool:
         return False
 
 
+def _copy_if_present(src: Path, dest: Path) -> bool:
+    """Copy src to dest; return False if src does not exist."""
+    try:
+        shutil.copyfile(src, dest)
+    except FileNotFoundError:
+        return False
+    return True
+
+
 def consolidate_reports(ticker: str) -> Dict[str, Optional[Path]]:
     """
     Copy agent reports to hybrid output directory.
@@ -195,14 +257,13 @@ def consolidate_reports(ticker: str) -> Dict[str, Optional[Path]]:
     dest_fund_pdf = HYBRID_OUTPUT_DIR / f"{ticker}_fundamental_analysis.pdf"
     dest_fund_html = HYBRID_OUTPUT_DIR / f"{ticker}_fundamental_analysis.html"
 
-    if fund_html.exists():
-        shutil.copy2(fund_html, dest_fund_html)
+    has_fund_html = _copy_if_present(fund_html, dest_fund_html)
+    if has_fund_html:
         print(f"[REPORTS] Fundamental HTML: {dest_fund_html}")
 
-    if fund_pdf.exists():
-        shutil.copy2(fund_pdf, dest_fund_pdf)
+    if _copy_if_present(fund_pdf, dest_fund_pdf):
         print(f"[REPORTS] Fundamental PDF: {dest_fund_pdf}")
-    elif fund_html.exists():
+    elif has_fund_html:
         if _convert_html_to_pdf(fund_html, dest_fund_pdf):
             print(f"[REPORTS] Fundamental PDF (converted): {dest_fund_pdf}")
 
@@ -215,14 +276,13 @@ def consolidate_reports(ticker: str) -> Dict[str, Optional[Path]]:
     dest_tech_pdf = HYBRID_OUTPUT_DIR / f"{ticker}_technical_analysis.pdf"
     dest_tech_html = HYBRID_OUTPUT_DIR / f"{ticker}_technical_analysis.html"
 
-    if tech_html.exists():
-        shutil.copy2(tech_html, dest_tech_html)
+    has_tech_html = _copy_if_present(tech_html, dest_tech_html)
+    if has_tech_html:
         print(f"[REPORTS] Technical HTML: {dest_tech_html}")
 
-    if tech_pdf.exists():
-        shutil.copy2(tech_pdf, dest_tech_pdf)
+    if _copy_if_present(tech_pdf, dest_tech_pdf):
         print(f"[REPORTS] Technical PDF: {dest_tech_pdf}")
-    elif tech_html.exists():
+    elif has_tech_html:
         if _convert_html_to_pdf(tech_html, dest_tech_pdf):
             print(f"[REPORTS] Technical PDF (converted): {dest_tech_pdf}")
 
@@ -246,15 +306,16 @@ def merge_evidence(
     gate2_pass, gate2_reason = gate2_result
 
     action = determine_action(gate1_pass, gate2_pass)
+    fund_meta = fundamental['meta']
 
     return {
         "meta": {
             "ticker": ticker.upper(),
-            "company_name": fundamental['meta']['company_name'],
-            "sector": fundamental['meta']['sector'],
-            "industry": fundamental['meta']['industry'],
-            "analysis_date": fundamental['meta']['analysis_date'],
-            "market_cap": fundamental['meta']['market_cap'],
+            "company_name": fund_meta['company_name'],
+            "sector": fund_meta['sector'],
+            "industry": fund_meta['industry'],
+            "analysis_date": fund_meta['analysis_date'],
+            "market_cap": fund_meta['market_cap'],
         },
         "gates": {
             "gate1": {
@@ -274,7 +335,7 @@ def merge_evidence(
     }
 
 
-def run_hybrid_analysis(ticker: str) -> Dict[str, Any]:
+def run_hybrid_analysis(ticker: str, force: bool = False, parallel: bool = False) -> Dict[str, Any]:
     """
     Main entry point for hybrid analysis.
 
@@ -282,14 +343,32 @@ def run_hybrid_analysis(ticker: str) -> Dict[str, Any]:
     1. Run Fundamental → check Gate 1
     2. If Gate 1 PASS → Run Technical → check Gate 2
     3. Merge evidence → determine action
+
+    Set force=True to re-run the fundamental agent even if today's evidence exists.
+    Set parallel=True to start the technical agent alongside the fundamental one;
+    its result is discarded if Gate 1 fails (a failure is still printed). In
+    parallel mode this call always blocks until the technical subprocess
+    exits, even when Gate 1 fails or the fundamental agent raises, whose
+    error is only re-raised after that. Technical output printed from the
+    worker thread may interleave with the fundamental/Gate 1 console output.
     """
     print("=" * 60)
     print(f"  HYBRID ANALYST AGENT")
     print(f"  Ticker: {ticker.upper()}")
     print("=" * 60)
 
+    if not parallel:
+        return _run_gates(ticker, force, technical_future=None)
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        technical_future = executor.submit(run_technical_agent, ticker)
+        return _run_gates(ticker, force, technical_future)
+
+
+def _run_gates(ticker: str, force: bool, technical_future: Optional[Future]) -> Dict[str, Any]:
+    """Run both gates; the technical agent may already be running in technical_future."""
     # Step 1: Run Fundamental Analysis
-    fundamental = run_fundamental_agent(ticker)
+    fundamental = run_fundamental_agent(ticker, force=force)
 
     # Step 2: Check Gate 1
     gate1_pass, gate1_reason = check_gate1(fundamental)
@@ -298,6 +377,12 @@ def run_hybrid_analysis(ticker: str) -> Dict[str, Any]:
     # Step 3: If Gate 1 fails, stop here
     if not gate1_pass:
         print("\n[HYBRID] Gate 1 FAILED - No technical analysis needed")
+        if technical_future is not None:
+            # Blocks until the speculative run exits (the executor would
+            # anyway) so a failure there is reported rather than dropped
+            technical_error = technical_future.exception()
+            if technical_error is not None:
+                print(f"[TECHNICAL] Speculative run failed (ignored): {technical_error}")
         return merge_evidence(
             ticker=ticker,
             fundamental=fundamental,
@@ -307,7 +392,10 @@ def run_hybrid_analysis(ticker: str) -> Dict[str, Any]:
         )
 
     # Step 4: Run Technical Analysis
-    technical = run_technical_agent(ticker)
+    if technical_future is not None:
+        technical = technical_future.result()
+    else:
+        technical = run_technical_agent(ticker)
 
     # Step 5: Check Gate 2
     gate2_pass, gate2_reason = check_gate2(technical)
@@ -6,22 +6,20 @@ Generates investment memo matching professional PDF style.
 
 import os
 import base64
-from datetime import datetime
+import functools
+import importlib.util
+from datetime import date, datetime
 from typing import Dict, Any, Optional
 from pathlib import Path
 
-# Optional: LLM for thesis generation
-try:
-    from openai import OpenAI
-    HAS_OPENAI = True
-except ImportError:
-    HAS_OPENAI = False
+# Optional: LLM for thesis generation. Only probe for the package here;
+# importing openai pulls in httpx/pydantic, so defer it to the one call site.
+HAS_OPENAI = importlib.util.find_spec("openai") is not None
 
 
-def _encode_image(path: str) -> Optional[str]:
-    """Encode image to base64 for embedding in HTML."""
-    if not path or not os.path.exists(path):
-        return None
+@functools.lru_cache(maxsize=32)
+def _encode_image_cached(path: str, mtime: float) -> Optional[str]:
+    """Encode image bytes; keyed on mtime so a regenerated chart is re-read."""
     try:
         with open(path, 'rb') as f:
             return base64.b64encode(f.read()).decode('utf-8')
@@ -29,6 +27,25 @@ def _encode_image(path: str) -> Optional[str]:
         return None
 
 
+def _encode_image(path: Optional[str]) -> Optional[str]:
+    """Encode image to base64 for embedding in HTML."""
+    if not path:
+        return None
+    try:
+        mtime = os.stat(path).st_mtime
+    except OSError:
+        return None
+    return _encode_image_cached(path, mtime)
+
+
+def _resolve_chart_path(charts: Dict, key: str, base_dir: Path) -> Optional[str]:
+    """Resolve a chart path from the technical evidence relative to its agent directory."""
+    path = charts.get(key)
+    if not path:
+        return None
+    return str(path) if os.path.isabs(path) else str(base_dir / path)
+
+
 def _fmt_pct(value: float, decimals: int = 1) -> str:
     """Format percentage."""
     if value is None:
@@ -57,22 +74,34 @@ def _fmt_multiple(value: float) -> str:
     return f"{value:.2f}x"
 
 
-def _generate_investment_thesis(evidence: Dict[str, Any]) -> str:
-    """Generate investment thesis using LLM or fallback to template."""
-    meta = evidence['meta']
-    fundamental = evidence.get('fundamental', {})
-    technical = evidence.get('technical')
-    gates = evidence['gates']
-    action = evidence['action']
+def _fmt_number(value: float) -> str:
+    """Format plain number (e.g., Sharpe ratio; null in the evidence when undefined)."""
+    if value is None:
+        return "N/A"
+    return f"{value:.2f}"
 
-    rec = fundamental.get('recommendation', {})
-    ratios = fundamental.get('ratios', {})
-    tech_metrics = technical.get('metrics', {}) if technical else {}
 
+THESIS_TIMEOUT_S = 60.0
+
+# Static tail of the thesis prompt; only the DATA block varies per ticker
+_THESIS_STRUCTURE = """STRUCTURE:
+Paragraph 1: Open with rating and target. Explain valuation anchor.
+Paragraph 2: Key fundamental drivers - growth, profitability, moat.
+Paragraph 3: Technical timing and risk management. Final action.
+
+Write in third person, professional tone. No bullet points. Plain text only."""
+
+
+def _generate_investment_thesis(meta: Dict, gates: Dict, action: str, rec: Dict,
+                                classification: Dict, ratios: Dict, tech_metrics: Dict) -> str:
+    """Generate investment thesis using LLM or fallback to template."""
     # Try LLM generation
     if HAS_OPENAI and os.environ.get('OPENAI_API_KEY'):
         try:
-            client = OpenAI()
+            from openai import OpenAI
+
+            # Short timeout: on failure we fall back to the template thesis below
+            client = OpenAI(timeout=THESIS_TIMEOUT_S)
 
             prompt = f"""Generate a 150-200 word investment thesis for {meta['company_name']} ({meta['ticker']}).
 
@@ -82,7 +111,7 @@ DATA:
 - Current Price: ${rec.get('current_price', 0):.2f}
 - Upside: {(rec.get('upside_downside', 0) or 0)*100:+.1f}%
 - Sector: {meta['sector']} / {meta['industry']}
-- Company Type: {fundamental.get('classification', {}).get('company_type', 'N/A')}
+- Company Type: {classification.get('company_type', 'N/A')}
 - ROE: {(ratios.get('roe', 0) or 0)*100:.1f}%
 - Net Margin: {(ratios.get('net_margin', 0) or 0)*100:.1f}%
 - Revenue Growth: {(ratios.get('revenue_growth', 0) or 0)*100:.1f}%
@@ -93,12 +122,7 @@ DATA:
 - Strategy Sharpe: {tech_metrics.get('Sharpe', 'N/A')}
 - Strategy Max Drawdown: {(tech_metrics.get('MaxDrawdown', 0) or 0)*100:.1f}%
 
-STRUCTURE:
-Paragraph 1: Open with rating and target. Explain valuation anchor.
-Paragraph 2: Key fundamental drivers - growth, profitability, moat.
-Paragraph 3: Technical timing and risk management. Final action.
-
-Write in third person, professional tone. No bullet points. Plain text only."""
+""" + _THESIS_STRUCTURE
 
             response = client.chat.completions.create(
                 model="gpt-4",
@@ -118,7 +142,7 @@ Write in third person, professional tone. No bullet points. Plain text only."""
 
 The company demonstrates strong fundamentals with ROE of {_fmt_ratio(ratios.get('roe'))} and net margin of {_fmt_ratio(ratios.get('net_margin'))}. Revenue growth of {_fmt_ratio(ratios.get('revenue_growth'))} supports the growth classification, while conservative leverage (D/E {_fmt_multiple(ratios.get('debt_to_equity'))}) provides financial flexibility.
 
-Both fundamental and technical gates have been passed, supporting immediate entry. The systematic strategy shows favorable risk-adjusted returns with a Sharpe ratio of {tech_metrics.get('Sharpe', 0):.2f} and controlled drawdowns of {_fmt_ratio(tech_metrics.get('MaxDrawdown'))}. Current market regime is bullish, confirming execution timing."""
+Both fundamental and technical gates have been passed, supporting immediate entry. The systematic strategy shows favorable risk-adjusted returns with a Sharpe ratio of {_fmt_number(tech_metrics.get('Sharpe', 0))} and controlled drawdowns of {_fmt_ratio(tech_metrics.get('MaxDrawdown'))}. Current market regime is bullish, confirming execution timing."""
 
 
 def _build_gate_status_table(gates: Dict, action: str) -> str:
@@ -178,15 +202,15 @@ def _build_gate_status_table(gates: Dict, action: str) -> str:
 
 def _build_sensitivity_table(valuation: Dict, rec: Dict) -> str:
     """Build Bull/Base/Bear valuation sensitivity table."""
+    base_value = rec.get('fair_value', 0) or 0
+    if base_value <= 0:
+        return ""
+
     dcf = valuation.get('dcf', {})
     base_wacc = dcf.get('wacc', 0.12) or 0.12
     base_growth = dcf.get('stage1_growth', 0.3) or 0.3
-    base_value = rec.get('fair_value', 0) or 0
     current_price = rec.get('current_price', 0) or 0
 
-    if base_value <= 0:
-        return ""
-
     # Calculate scenarios (simplified sensitivity)
     # Bear: higher WACC (+2%), lower growth (-10%)
     # Bull: lower WACC (-2%), higher growth (+10%)
@@ -691,6 +715,7 @@ def generate_html_report(evidence: Dict[str, Any], output_path: str) -> str:
     rec = fundamental.get('recommendation', {})
     classification = fundamental.get('classification', {})
     valuation = fundamental.get('valuation', {})
+    val_weights = valuation.get('weights', {})
     ratios = fundamental.get('ratios', {})
     historical_ratios = fundamental.get('historical_ratios', [])
     risk_factors = fundamental.get('risk_factors', {})
@@ -726,7 +751,7 @@ def generate_html_report(evidence: Dict[str, Any], output_path: str) -> str:
         action_class = "no-trade"
 
     # Build HTML
-    html = f"""<!DOCTYPE html>
+    parts = [f"""<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
@@ -776,12 +801,12 @@ def generate_html_report(evidence: Dict[str, Any], output_path: str) -> str:
         <tr>
             <td>DCF (Discounted Cash Flow)</td>
             <td class="value-cell">{_fmt_price(valuation.get('dcf', {}).get('fair_value'))}</td>
-            <td class="value-cell">{_fmt_pct(valuation.get('weights', {}).get('dcf', 0.7), 0)}</td>
+            <td class="value-cell">{_fmt_pct(val_weights.get('dcf', 0.7), 0)}</td>
         </tr>
         <tr>
             <td>Multiples (Peers: {', '.join(peers[:3]) if peers else 'N/A'})</td>
             <td class="value-cell">{_fmt_price(valuation.get('multiples', {}).get('fair_value'))}</td>
-            <td class="value-cell">{_fmt_pct(valuation.get('weights', {}).get('multiples', 0.3), 0)}</td>
+            <td class="value-cell">{_fmt_pct(val_weights.get('multiples', 0.3), 0)}</td>
         </tr>
         <tr style="font-weight: 600; background: #f0f9ff;">
             <td>Weighted Fair Value</td>
@@ -809,14 +834,16 @@ def generate_html_report(evidence: Dict[str, Any], output_path: str) -> str:
     Given these fundamental merits, we proceed to evaluate the technical performance characteristics and risk-adjusted returns
     through systematic backtesting.
 </p>
-"""
+"""]
 
     # Add Technical Analysis section if available
     if technical:
-        html += _build_technical_section(tech_metrics, latest_state, charts, meta['ticker'])
+        parts.append(_build_technical_section(tech_metrics, latest_state, charts, meta['ticker']))
 
     # Generate Investment Thesis with LLM
-    investment_thesis = _generate_investment_thesis(evidence)
+    investment_thesis = _generate_investment_thesis(
+        meta, gates, action, rec, classification, ratios, tech_metrics
+    )
 
     # Prepare metrics for recommendation section
     upside = rec.get('upside_downside', 0) or 0
@@ -825,7 +852,7 @@ def generate_html_report(evidence: Dict[str, Any], output_path: str) -> str:
     cagr = tech_metrics.get('CAGR', 0) if technical else 0
 
     # Add Investment Recommendation section
-    html += f"""
+    parts.append(f"""
 <!-- 3. INVESTMENT RECOMMENDATION -->
 <h2>3. Investment Recommendation</h2>
 
@@ -856,7 +883,7 @@ def generate_html_report(evidence: Dict[str, Any], output_path: str) -> str:
         </div>
         <div class="metric-box">
             <div class="metric-label">Sharpe Ratio</div>
-            <div class="metric-value">{sharpe:.2f}</div>
+            <div class="metric-value">{_fmt_number(sharpe)}</div>
         </div>
         <div class="metric-box">
             <div class="metric-label">Max Drawdown</div>
@@ -870,13 +897,13 @@ def generate_html_report(evidence: Dict[str, Any], output_path: str) -> str:
     <div class="thesis-content">{investment_thesis}</div>
 </div>
 
-"""
+""")
 
     # Add Appendix
-    html += _build_appendix(fundamental, technical, meta)
+    parts.append(_build_appendix(valuation, technical))
 
     # Disclaimer
-    html += """
+    parts.append("""
 <div class="disclaimer">
     <strong>Disclaimer:</strong> This report was generated by an AI-powered hybrid analysis agent for educational purposes.
     Not financial advice. Past performance does not guarantee future results.
@@ -884,16 +911,42 @@ def generate_html_report(evidence: Dict[str, Any], output_path: str) -> str:
 
 </body>
 </html>
-"""
+""")
 
     # Save file
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
     with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(html)
+        f.write("".join(parts))
 
     return output_path
 
 
+def _fmt_times(value: float) -> str:
+    """Format coverage/liquidity multiple (one decimal)."""
+    return f"{value:.1f}x"
+
+
+# (group label, evidence key, ((metric key, row label, formatter), ...))
+_HISTORICAL_RATIO_SPEC = (
+    ('Profitability', 'profitability', (
+        ('gross_margin', 'Gross Margin', _fmt_ratio),
+        ('operating_margin', 'Operating Margin', _fmt_ratio),
+        ('net_margin', 'Net Margin', _fmt_ratio),
+        ('roe', 'ROE', _fmt_ratio),
+        ('roa', 'ROA', _fmt_ratio),
+    )),
+    ('Leverage', 'leverage', (
+        ('debt_to_equity', 'Debt/Equity', _fmt_ratio),
+        ('debt_to_assets', 'Debt/Assets', _fmt_ratio),
+        ('interest_coverage', 'Interest Coverage', _fmt_times),
+    )),
+    ('Liquidity', 'liquidity', (
+        ('current_ratio', 'Current Ratio', _fmt_times),
+        ('quick_ratio', 'Quick Ratio', _fmt_times),
+    )),
+)
+
+
 def _build_historical_ratios_table(historical_ratios: list) -> str:
     """Build historical financial ratios table."""
     if not historical_ratios:
@@ -901,76 +954,35 @@ def _build_historical_ratios_table(historical_ratios: list) -> str:
 
     years = [yr['year'] for yr in historical_ratios]
 
-    html = """
+    parts = ["""
 <h3>Historical Financial Metrics (5-Year Trend)</h3>
 <table>
     <thead>
         <tr>
             <th>Metric</th>
-"""
+"""]
     for year in years:
-        html += f"            <th class=\"value-cell\">{year}</th>\n"
-    html += """        </tr>
+        parts.append(f"            <th class=\"value-cell\">{year}</th>\n")
+    parts.append("""        </tr>
     </thead>
     <tbody>
-"""
+""")
+
+    for group_label, group_key, metrics in _HISTORICAL_RATIO_SPEC:
+        parts.append(f"        <tr style=\"background: #f0f9ff; font-weight: 600;\"><td colspan=\"{len(years) + 1}\">{group_label}</td></tr>\n")
+        groups = [yr.get(group_key, {}) for yr in historical_ratios]
+
+        for key, label, fmt in metrics:
+            cells = "".join(
+                f"<td class=\"value-cell\">{fmt(val) if val else 'N/A'}</td>"
+                for val in [group.get(key) for group in groups]
+            )
+            parts.append(f"        <tr><td>{label}</td>{cells}</tr>\n")
 
-    # Profitability metrics
-    html += "        <tr style=\"background: #f0f9ff; font-weight: 600;\"><td colspan=\"" + str(len(years) + 1) + "\">Profitability</td></tr>\n"
-
-    metrics_prof = [
-        ('gross_margin', 'Gross Margin'),
-        ('operating_margin', 'Operating Margin'),
-        ('net_margin', 'Net Margin'),
-        ('roe', 'ROE'),
-        ('roa', 'ROA'),
-    ]
-
-    for key, label in metrics_prof:
-        html += f"        <tr><td>{label}</td>"
-        for yr in historical_ratios:
-            val = yr.get('profitability', {}).get(key)
-            html += f"<td class=\"value-cell\">{_fmt_ratio(val) if val else 'N/A'}</td>"
-        html += "</tr>\n"
-
-    # Leverage metrics
-    html += "        <tr style=\"background: #f0f9ff; font-weight: 600;\"><td colspan=\"" + str(len(years) + 1) + "\">Leverage</td></tr>\n"
-
-    metrics_lev = [
-        ('debt_to_equity', 'Debt/Equity'),
-        ('debt_to_assets', 'Debt/Assets'),
-        ('interest_coverage', 'Interest Coverage'),
-    ]
-
-    for key, label in metrics_lev:
-        html += f"        <tr><td>{label}</td>"
-        for yr in historical_ratios:
-            val = yr.get('leverage', {}).get(key)
-            if key == 'interest_coverage':
-                html += f"<td class=\"value-cell\">{val:.1f}x</td>" if val else "<td class=\"value-cell\">N/A</td>"
-            else:
-                html += f"<td class=\"value-cell\">{_fmt_ratio(val) if val else 'N/A'}</td>"
-        html += "</tr>\n"
-
-    # Liquidity metrics
-    html += "        <tr style=\"background: #f0f9ff; font-weight: 600;\"><td colspan=\"" + str(len(years) + 1) + "\">Liquidity</td></tr>\n"
-
-    metrics_liq = [
-        ('current_ratio', 'Current Ratio'),
-        ('quick_ratio', 'Quick Ratio'),
-    ]
-
-    for key, label in metrics_liq:
-        html += f"        <tr><td>{label}</td>"
-        for yr in historical_ratios:
-            val = yr.get('liquidity', {}).get(key)
-            html += f"<td class=\"value-cell\">{val:.1f}x</td>" if val else "<td class=\"value-cell\">N/A</td>"
-        html += "</tr>\n"
-
-    html += """    </tbody>
+    parts.append("""    </tbody>
 </table>
-"""
-    return html
+""")
+    return "".join(parts)
 
 
 def _build_risk_text(risk_factors: Dict) -> str:
@@ -992,35 +1004,15 @@ def _build_risk_text(risk_factors: Dict) -> str:
 def _build_technical_section(metrics: Dict, latest: Dict, charts: Dict, ticker: str) -> str:
     """Build Technical Analysis HTML section."""
 
-    # Get chart paths and encode
+    # Resolve chart paths; each image is only encoded where its block is rendered
     tech_dir = Path(__file__).parent.parent.parent.parent / "connie_technical"
 
-    golden_cross_chart = None
-    drawdown_compare_chart = None
-    equity_log_chart = None
-    price_ma_chart = None
-
-    golden_cross_path = charts.get('golden_cross_trades')
-    if golden_cross_path:
-        full_path = tech_dir / golden_cross_path if not os.path.isabs(golden_cross_path) else golden_cross_path
-        golden_cross_chart = _encode_image(str(full_path))
-
-    drawdown_path = charts.get('drawdown_compare')
-    if drawdown_path:
-        full_path = tech_dir / drawdown_path if not os.path.isabs(drawdown_path) else drawdown_path
-        drawdown_compare_chart = _encode_image(str(full_path))
+    golden_cross_path = _resolve_chart_path(charts, 'golden_cross_trades', tech_dir)
+    drawdown_path = _resolve_chart_path(charts, 'drawdown_compare', tech_dir)
+    equity_log_path = _resolve_chart_path(charts, 'equity_log_compare', tech_dir)
+    price_ma_path = _resolve_chart_path(charts, 'price_ma_macd_6m', tech_dir)
 
-    equity_log_path = charts.get('equity_log_compare')
-    if equity_log_path:
-        full_path = tech_dir / equity_log_path if not os.path.isabs(equity_log_path) else equity_log_path
-        equity_log_chart = _encode_image(str(full_path))
-
-    price_ma_path = charts.get('price_ma_macd_6m')
-    if price_ma_path:
-        full_path = tech_dir / price_ma_path if not os.path.isabs(price_ma_path) else price_ma_path
-        price_ma_chart = _encode_image(str(full_path))
-
-    html = f"""
+    parts = [f"""
 <!-- 2. TECHNICAL ANALYSIS -->
 <h2>2. Technical Analysis</h2>
 
@@ -1031,7 +1023,7 @@ def _build_technical_section(metrics: Dict, latest: Dict, charts: Dict, ticker:
     </thead>
     <tbody>
         <tr><td>CAGR (Compound Annual Growth Rate)</td><td class="value-cell">{_fmt_ratio(metrics.get('CAGR'))}</td></tr>
-        <tr><td>Sharpe Ratio</td><td class="value-cell">{metrics.get('Sharpe', 0):.2f}</td></tr>
+        <tr><td>Sharpe Ratio</td><td class="value-cell">{_fmt_number(metrics.get('Sharpe', 0))}</td></tr>
         <tr><td>Maximum Drawdown</td><td class="value-cell">{_fmt_ratio(metrics.get('MaxDrawdown'))}</td></tr>
         <tr><td>Hit Rate</td><td class="value-cell">{_fmt_ratio(metrics.get('HitRate'))}</td></tr>
         <tr><td>Number of Trades</td><td class="value-cell">{metrics.get('NumTrades', 'N/A')}</td></tr>
@@ -1041,7 +1033,7 @@ def _build_technical_section(metrics: Dict, latest: Dict, charts: Dict, ticker:
 </table>
 
 <h3>Strategy Charts</h3>
-"""
+"""]
 
     # Chart descriptions using metrics data
     num_trades = metrics.get('NumTrades', 0)
@@ -1054,72 +1046,141 @@ def _build_technical_section(metrics: Dict, latest: Dict, charts: Dict, ticker:
     ma200 = latest.get('ma200', 0)
     close = latest.get('close', 0)
 
+    golden_cross_chart = _encode_image(golden_cross_path)
     if golden_cross_chart:
-        html += f"""
+        parts.append(f"""
 <div class="chart-container">
     <div class="chart-title">Trade Entry & Exit Points</div>
     <img src="data:image/png;base64,{golden_cross_chart}" alt="Trade Entry & Exit Points">
     <p class="chart-desc">MA200-based regime gate over the full backtest period. Blue line: closing price, orange: MA50, green: MA200 (regime boundary). Golden/Death Cross triangles mark regime transitions. Green dots = entries, red crosses = exits. Total {num_trades} trades with {hit_rate*100:.0f}% hit rate.</p>
 </div>
-"""
+""")
 
+    equity_log_chart = _encode_image(equity_log_path)
     if equity_log_chart:
-        html += f"""
+        parts.append(f"""
 <div class="chart-container">
     <div class="chart-title">Equity Comparison (Log Scale)</div>
     <img src="data:image/png;base64,{equity_log_chart}" alt="Equity Comparison">
     <p class="chart-desc">Log-scaled equity curves normalised to starting value of 1.0. Buy-and-hold (blue): {bh_multiple:.2f}x multiple with full market exposure. Strategy (orange): {strat_multiple:.2f}x multiple with conditional exposure. Flat segments indicate periods when regime gate is closed and capital is preserved.</p>
 </div>
-"""
+""")
 
+    drawdown_compare_chart = _encode_image(drawdown_path)
     if drawdown_compare_chart:
-        html += f"""
+        parts.append(f"""
 <div class="chart-container">
     <div class="chart-title">Drawdown Comparison</div>
     <img src="data:image/png;base64,{drawdown_compare_chart}" alt="Drawdown Comparison">
     <p class="chart-desc">Strategy maximum drawdown of {max_dd*100:.1f}% compares favorably to buy-and-hold, demonstrating shallower peak-to-trough losses. MA200 regime filter exits positions during bearish phases, prioritizing capital preservation while maintaining participation in bullish trends.</p>
 </div>
-"""
+""")
 
+    price_ma_chart = _encode_image(price_ma_path)
     if price_ma_chart:
         trend_status = "uptrend" if ma20 > ma50 else "downtrend"
         regime_status = "bullish" if close > ma200 else "bearish"
-        html += f"""
+        parts.append(f"""
 <div class="chart-container">
     <div class="chart-title">Price with Moving Averages & MACD (6 Months)</div>
     <img src="data:image/png;base64,{price_ma_chart}" alt="Price MA MACD">
     <p class="chart-desc">Six-month price action with MA20/MA50/MA200 overlays. Current trend: {trend_status} (MA20 {'>' if ma20 > ma50 else '<'} MA50), regime: {regime_status}. Lower panel: MACD momentum analysis — crossover above signal line indicates strengthening momentum.</p>
 </div>
-"""
+""")
 
     # Technical summary
     regime = "bullish" if latest.get('regime_bullish') else "bearish"
 
-    html += f"""
+    parts.append(f"""
 <p class="narrative">
     <strong>Technical Analysis Summary:</strong> The technical backtest demonstrates a CAGR of {_fmt_ratio(metrics.get('CAGR'))}
-    with a Sharpe ratio of {metrics.get('Sharpe', 0):.2f}, indicating {'strong' if metrics.get('Sharpe', 0) > 1 else 'moderate'} risk-adjusted returns.
+    with a Sharpe ratio of {_fmt_number(metrics.get('Sharpe', 0))}, indicating {'strong' if (metrics.get('Sharpe', 0) or 0) > 1 else 'moderate'} risk-adjusted returns.
     The strategy experienced a maximum drawdown of {_fmt_ratio(metrics.get('MaxDrawdown'))}, which remains within
     {'acceptable' if abs(metrics.get('MaxDrawdown', 0)) < 0.25 else 'elevated'} risk parameters.
     Over the backtest period, the strategy executed {metrics.get('NumTrades', 0)} trades with a hit rate of {_fmt_ratio(metrics.get('HitRate'))},
     supporting the fundamental investment thesis with quantitative evidence of favorable risk-reward characteristics.
     Current market regime is <strong>{regime}</strong> (Close {'>' if latest.get('regime_bullish') else '<'} MA200).
 </p>
+""")
+
+    return "".join(parts)
+
+
+# Static appendix blocks (no per-ticker values)
+_STRATEGY_PARAMS_HTML = """
+<h3>Appendix C: Strategy Parameters</h3>
+
+<p class="narrative">Technical strategy rules and risk management parameters.</p>
+
+<table>
+    <thead>
+        <tr><th>Parameter</th><th>Value</th><th>Purpose</th></tr>
+    </thead>
+    <tbody>
+        <tr><td>Strategy Type</td><td>Long/Flat</td><td>No short positions</td></tr>
+        <tr><td>Regime Filter</td><td>Close > MA200</td><td>Bull market identification</td></tr>
+        <tr><td>Entry Signal</td><td>MA20 crosses above MA50</td><td>Golden cross confirmation</td></tr>
+        <tr><td>Exit Signal</td><td>MA20 crosses below MA50</td><td>Death cross or stop hit</td></tr>
+        <tr><td>Fixed Stop Loss</td><td>12%</td><td>Maximum loss per trade</td></tr>
+        <tr><td>ATR Trailing Stop</td><td>3.5x ATR(14)</td><td>Dynamic stop to lock gains</td></tr>
+        <tr><td>Transaction Costs</td><td>10 bps</td><td>Round-trip cost assumption</td></tr>
+        <tr><td>Look-ahead Bias</td><td>Signals shifted +1 day</td><td>Realistic execution</td></tr>
+    </tbody>
+</table>
 """
 
-    return html
+_FUNDAMENTAL_METHODOLOGY_HTML = """
+<h3>Appendix D: Fundamental Methodology</h3>
+
+<p class="narrative">Gate Checks (Safety Filters):</p>
+<table>
+    <thead>
+        <tr><th>Gate</th><th class="value-cell">Threshold</th><th class="value-cell">Severity</th></tr>
+    </thead>
+    <tbody>
+        <tr><td>Interest Coverage</td><td class="value-cell">≥ 1.5x</td><td class="value-cell">CRITICAL</td></tr>
+        <tr><td>Current Ratio</td><td class="value-cell">≥ 0.8x</td><td class="value-cell">HIGH</td></tr>
+        <tr><td>Debt/Equity</td><td class="value-cell">≤ 5.0x</td><td class="value-cell">HIGH</td></tr>
+    </tbody>
+</table>
+
+<p class="narrative" style="margin-top: 20px;">Recommendation Logic:</p>
+<table>
+    <thead>
+        <tr><th>Condition</th><th class="value-cell">Recommendation</th></tr>
+    </thead>
+    <tbody>
+        <tr><td>Upside > +20% AND no HIGH/CRITICAL gates</td><td class="value-cell"><strong>BUY</strong></td></tr>
+        <tr><td>Upside > +20% BUT has HIGH gate</td><td class="value-cell"><strong>HOLD</strong></td></tr>
+        <tr><td>-10% < Upside < +20%</td><td class="value-cell"><strong>HOLD</strong></td></tr>
+        <tr><td>Upside < -10%</td><td class="value-cell"><strong>SELL</strong></td></tr>
+        <tr><td>Any CRITICAL gate triggered</td><td class="value-cell"><strong>SELL</strong></td></tr>
+    </tbody>
+</table>
+"""
 
 
-def _build_appendix(fundamental: Dict, technical: Dict, meta: Dict) -> str:
+def _parse_trade_date(value: Any) -> Optional[date]:
+    """Parse a YYYY-MM-DD trade date; None when missing or malformed."""
+    if not isinstance(value, str):
+        return None
+    try:
+        # Canonical ISO dates (what the technical agent writes) take the C parser
+        if len(value) == 10 and value[4] == '-' and value[7] == '-':
+            return date.fromisoformat(value)
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        return None
+
+
+def _build_appendix(valuation: Dict, technical: Dict) -> str:
     """Build Appendix sections."""
-    valuation = fundamental.get('valuation', {})
-    peers = fundamental.get('peers', [])
-    forward = fundamental.get('forward_estimates', {})
     dcf = valuation.get('dcf', {})
     multiples = valuation.get('multiples', {})
+    peer_avgs = multiples.get('peer_averages', {})
     weights = valuation.get('weights', {})
 
-    html = """
+    parts = ["""
 <div class="appendix">
 <h2>Appendix</h2>
 
@@ -1133,9 +1194,9 @@ with conservative assumptions reflecting the company's maturity and market posit
         <tr><th>Parameter</th><th class="value-cell">Value</th><th>Description</th></tr>
     </thead>
     <tbody>
-"""
+"""]
 
-    html += f"""        <tr><td>Discount Rate (WACC)</td><td class="value-cell">{_fmt_ratio(dcf.get('wacc'))}</td><td>Weighted average cost of capital</td></tr>
+    parts.append(f"""        <tr><td>Discount Rate (WACC)</td><td class="value-cell">{_fmt_ratio(dcf.get('wacc'))}</td><td>Weighted average cost of capital</td></tr>
         <tr><td>Stage 1 Growth (Years 1-5)</td><td class="value-cell">{_fmt_ratio(dcf.get('stage1_growth'))}</td><td>High growth phase</td></tr>
         <tr><td>Stage 2 Growth (Years 6-10)</td><td class="value-cell">{_fmt_ratio((dcf.get('stage1_growth', 0.3) or 0.3) * 0.5)}</td><td>Transition phase (50% of Stage 1)</td></tr>
         <tr><td>Terminal Growth Rate</td><td class="value-cell">{_fmt_ratio(dcf.get('terminal_growth'))}</td><td>Perpetual growth assumption</td></tr>
@@ -1150,16 +1211,16 @@ with conservative assumptions reflecting the company's maturity and market posit
         <tr><th>Multiple</th><th class="value-cell">Company</th><th class="value-cell">Peer Average</th></tr>
     </thead>
     <tbody>
-        <tr><td>PEG Ratio</td><td class="value-cell">{(multiples.get('peg') or 0):.2f}x</td><td class="value-cell">{(multiples.get('peer_averages', {}).get('peg') or 0):.2f}x</td></tr>
-        <tr><td>EV/EBITDA</td><td class="value-cell">{(multiples.get('ev_ebitda') or 0):.1f}x</td><td class="value-cell">{(multiples.get('peer_averages', {}).get('ev_ebitda') or 0):.1f}x</td></tr>
-        <tr><td>P/B Ratio</td><td class="value-cell">{(multiples.get('pb') or 0):.1f}x</td><td class="value-cell">{(multiples.get('peer_averages', {}).get('pb') or 0):.1f}x</td></tr>
+        <tr><td>PEG Ratio</td><td class="value-cell">{(multiples.get('peg') or 0):.2f}x</td><td class="value-cell">{(peer_avgs.get('peg') or 0):.2f}x</td></tr>
+        <tr><td>EV/EBITDA</td><td class="value-cell">{(multiples.get('ev_ebitda') or 0):.1f}x</td><td class="value-cell">{(peer_avgs.get('ev_ebitda') or 0):.1f}x</td></tr>
+        <tr><td>P/B Ratio</td><td class="value-cell">{(multiples.get('pb') or 0):.1f}x</td><td class="value-cell">{(peer_avgs.get('pb') or 0):.1f}x</td></tr>
         <tr style="font-weight: 600; background: #f0f9ff;"><td>Multiples Fair Value</td><td class="value-cell" colspan="2">{_fmt_price(multiples.get('fair_value'))}</td></tr>
     </tbody>
 </table>
 
 <p class="narrative" style="margin-top: 20px;">Blending Weights: DCF {int((weights.get('dcf') or 0.7) * 100)}% / Multiples {int((weights.get('multiples') or 0.3) * 100)}% —
 weights reflect company type (growth companies favor DCF, mature companies favor multiples).</p>
-"""
+""")
 
     # Appendix B: Trade Log
     if technical:
@@ -1167,7 +1228,7 @@ weights reflect company type (growth companies favor DCF, mature companies favor
         backtest = technical.get('backtest_window', {})
         num_trades = len(all_trades)
 
-        html += f"""
+        parts.append(f"""
 <h3>Appendix B: Backtest Trade Log</h3>
 
 <p class="narrative">Complete trade log from the backtest period ({backtest.get('start', 'N/A')} to {backtest.get('end', 'N/A')}).
@@ -1178,92 +1239,39 @@ Total: {num_trades} trades executed.</p>
         <tr><th>Entry Date</th><th>Exit Date</th><th>Duration</th><th class="value-cell">Return</th><th>Outcome</th></tr>
     </thead>
     <tbody>
-"""
+""")
         for trade in all_trades:
             entry = trade.get('entry_date', 'N/A')
             exit_date = trade.get('exit_date', 'N/A')
             ret = trade.get('trade_metric_value', 0)
 
             # Calculate duration
-            try:
-                from datetime import datetime as dt
-                d1 = dt.strptime(entry, '%Y-%m-%d')
-                d2 = dt.strptime(exit_date, '%Y-%m-%d')
-                duration = (d2 - d1).days
-                duration_str = f"{duration} days"
-            except:
-                duration_str = "—"
+            d1 = _parse_trade_date(entry)
+            d2 = _parse_trade_date(exit_date)
+            duration_str = f"{(d2 - d1).days} days" if d1 and d2 else "—"
 
             outcome = "Win" if ret > 0 else "Loss"
             outcome_class = "positive" if ret > 0 else "negative"
 
-            html += f"""        <tr>
+            parts.append(f"""        <tr>
             <td>{entry}</td>
             <td>{exit_date}</td>
             <td>{duration_str}</td>
             <td class="value-cell {outcome_class}">{ret*100:+.1f}%</td>
             <td class="{outcome_class}">{outcome}</td>
         </tr>
-"""
+""")
 
-        html += """    </tbody>
+        parts.append("""    </tbody>
 </table>
-"""
+""")
 
-        # Appendix D: Strategy Parameters
-        html += """
-<h3>Appendix C: Strategy Parameters</h3>
-
-<p class="narrative">Technical strategy rules and risk management parameters.</p>
-
-<table>
-    <thead>
-        <tr><th>Parameter</th><th>Value</th><th>Purpose</th></tr>
-    </thead>
-    <tbody>
-        <tr><td>Strategy Type</td><td>Long/Flat</td><td>No short positions</td></tr>
-        <tr><td>Regime Filter</td><td>Close > MA200</td><td>Bull market identification</td></tr>
-        <tr><td>Entry Signal</td><td>MA20 crosses above MA50</td><td>Golden cross confirmation</td></tr>
-        <tr><td>Exit Signal</td><td>MA20 crosses below MA50</td><td>Death cross or stop hit</td></tr>
-        <tr><td>Fixed Stop Loss</td><td>12%</td><td>Maximum loss per trade</td></tr>
-        <tr><td>ATR Trailing Stop</td><td>3.5x ATR(14)</td><td>Dynamic stop to lock gains</td></tr>
-        <tr><td>Transaction Costs</td><td>10 bps</td><td>Round-trip cost assumption</td></tr>
-        <tr><td>Look-ahead Bias</td><td>Signals shifted +1 day</td><td>Realistic execution</td></tr>
-    </tbody>
-</table>
-"""
+        # Appendix C: Strategy Parameters
+        parts.append(_STRATEGY_PARAMS_HTML)
 
     # Appendix D: Fundamental Methodology
-    html += """
-<h3>Appendix D: Fundamental Methodology</h3>
-
-<p class="narrative">Gate Checks (Safety Filters):</p>
-<table>
-    <thead>
-        <tr><th>Gate</th><th class="value-cell">Threshold</th><th class="value-cell">Severity</th></tr>
-    </thead>
-    <tbody>
-        <tr><td>Interest Coverage</td><td class="value-cell">≥ 1.5x</td><td class="value-cell">CRITICAL</td></tr>
-        <tr><td>Current Ratio</td><td class="value-cell">≥ 0.8x</td><td class="value-cell">HIGH</td></tr>
-        <tr><td>Debt/Equity</td><td class="value-cell">≤ 5.0x</td><td class="value-cell">HIGH</td></tr>
-    </tbody>
-</table>
-
-<p class="narrative" style="margin-top: 20px;">Recommendation Logic:</p>
-<table>
-    <thead>
-        <tr><th>Condition</th><th class="value-cell">Recommendation</th></tr>
-    </thead>
-    <tbody>
-        <tr><td>Upside > +20% AND no HIGH/CRITICAL gates</td><td class="value-cell"><strong>BUY</strong></td></tr>
-        <tr><td>Upside > +20% BUT has HIGH gate</td><td class="value-cell"><strong>HOLD</strong></td></tr>
-        <tr><td>-10% < Upside < +20%</td><td class="value-cell"><strong>HOLD</strong></td></tr>
-        <tr><td>Upside < -10%</td><td class="value-cell"><strong>SELL</strong></td></tr>
-        <tr><td>Any CRITICAL gate triggered</td><td class="value-cell"><strong>SELL</strong></td></tr>
-    </tbody>
-</table>
-"""
+    parts.append(_FUNDAMENTAL_METHODOLOGY_HTML)
 
-    html += "</div>"
+    parts.append("</div>")
 
-    return html
+    return "".join(parts)
@@ -3,9 +3,12 @@ Configuration settings for the Fundamental Analyst Agent.
 """
 
 import os
-from dotenv import load_dotenv
 
-load_dotenv()
+# The hybrid controller passes its already-loaded environment to this agent;
+# only search for a .env file when the keys we need are not set yet.
+if not (os.getenv('ALPHA_VANTAGE_API_KEY') and os.getenv('OPENAI_API_KEY')):
+    from dotenv import load_dotenv
+    load_dotenv()
 
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 CACHE_DIR = os.path.join(PROJECT_ROOT, 'cache')
@@ -1,9 +1,10 @@
 import os
 import sys
-import json
 import traceback
 from datetime import datetime
 
+import orjson
+
 project_root = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, project_root)
 
@@ -359,6 +360,10 @@ def run_analysis(ticker: str):
 
         historical_ratios.reverse()
 
+        dcf_assumptions = dcf_result.get('assumptions') or {}
+        company_multiples = multiples_result.get('company_multiples') or {}
+        peer_averages = multiples_result.get('peer_averages') or {}
+
         evidence = {
             "meta": {
                 "ticker": ticker.upper(),
@@ -382,21 +387,21 @@ def run_analysis(ticker: str):
             "valuation": {
                 "dcf": {
                     "fair_value": dcf_result.get('fair_value_per_share'),
-                    "wacc": dcf_result.get('assumptions', {}).get('wacc'),
-                    "terminal_growth": dcf_result.get('assumptions', {}).get('terminal_growth_rate'),
-                    "stage1_growth": dcf_result.get('assumptions', {}).get('stage1_growth'),
+                    "wacc": dcf_assumptions.get('wacc'),
+                    "terminal_growth": dcf_assumptions.get('terminal_growth_rate'),
+                    "stage1_growth": dcf_assumptions.get('stage1_growth'),
                 },
                 "multiples": {
                     "fair_value": multiples_result.get('average_fair_value'),
-                    "pe": multiples_result.get('company_multiples', {}).get('pe'),
-                    "peg": multiples_result.get('company_multiples', {}).get('peg'),
-                    "pb": multiples_result.get('company_multiples', {}).get('pb'),
-                    "ev_ebitda": multiples_result.get('company_multiples', {}).get('ev_ebitda'),
+                    "pe": company_multiples.get('pe'),
+                    "peg": company_multiples.get('peg'),
+                    "pb": company_multiples.get('pb'),
+                    "ev_ebitda": company_multiples.get('ev_ebitda'),
                     "peer_averages": {
-                        "peg": multiples_result.get('peer_averages', {}).get('avg_peg'),
-                        "pe": multiples_result.get('peer_averages', {}).get('avg_pe'),
-                        "pb": multiples_result.get('peer_averages', {}).get('avg_pb'),
-                        "ev_ebitda": multiples_result.get('peer_averages', {}).get('avg_ev_ebitda'),
+                        "peg": peer_averages.get('avg_peg'),
+                        "pe": peer_averages.get('avg_pe'),
+                        "pb": peer_averages.get('avg_pb'),
+                        "ev_ebitda": peer_averages.get('avg_ev_ebitda'),
                     },
                 },
                 "ddm": {
@@ -415,8 +420,15 @@ def run_analysis(ticker: str):
 
         os.makedirs(OUTPUT_DIR, exist_ok=True)
         evidence_path = os.path.join(OUTPUT_DIR, f"{ticker.upper()}_evidence.json")
-        with open(evidence_path, 'w') as f:
-            json.dump(evidence, f, indent=2, default=str)
+        # numpy scalars are encoded natively and NaN is written as null;
+        # default=str only sees exotic types such as datetimes
+        data = orjson.dumps(
+            evidence,
+            default=str,
+            option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_PASSTHROUGH_DATETIME,
+        )
+        with open(evidence_path, 'wb') as f:
+            f.write(data)
 
         print(f"   [OK] Evidence saved: {evidence_path}")
 
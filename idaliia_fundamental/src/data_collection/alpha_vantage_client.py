@@ -2,6 +2,7 @@
 Alpha Vantage API client for fundamental financial data.
 """
 
+import functools
 import requests
 import time
 from typing import Dict, List, Optional
@@ -9,6 +10,252 @@ from .cache_manager import CacheManager
 from config.settings import ALPHA_VANTAGE_API_KEY, ALPHA_VANTAGE_BASE_URL
 
 
+@functools.lru_cache(maxsize=1024)
+def _normalize_key(key: str) -> str:
+    # Report keys repeat across every annual/quarterly entry, so cache the rewrite
+    return key.lower().replace(' ', '_').replace('-', '_')
+
+
+def _parse_number_str(value: str) -> Optional[float]:
+    if value == 'None' or value == '':
+        return None
+    try:
+        return float(value.strip().rstrip('%'))
+    except ValueError:
+        return None
+
+
+# Alpha Vantage field name -> internal name; built once at import
+_FIELD_MAPPINGS = {
+    'total_revenue': 'revenue',
+    'totalrevenue': 'revenue',
+    'TotalRevenue': 'revenue',
+    'revenues': 'revenue',
+    'sales': 'revenue',
+    'total_sales': 'revenue',
+
+    'cost_of_revenue': 'cost_of_revenue',
+    'costofrevenue': 'cost_of_revenue',
+    'CostOfRevenue': 'cost_of_revenue',
+    'cogs': 'cost_of_revenue',
+    'COGS': 'cost_of_revenue',
+    'cost_of_goods_sold': 'cost_of_revenue',
+    'costofgoodssold': 'cost_of_revenue',
+    'CostOfGoodsSold': 'cost_of_revenue',
+    'costofgoodsandservicessold': 'cost_of_revenue',
+    'cost_of_goods_and_services_sold': 'cost_of_revenue',
+
+    'operating_income': 'operating_income',
+    'operatingincome': 'operating_income',
+    'OperatingIncome': 'operating_income',
+    'ebit': 'operating_income',
+    'EBIT': 'operating_income',
+    'operating_profit': 'operating_income',
+
+    'net_income': 'net_income',
+    'netincome': 'net_income',
+    'NetIncome': 'net_income',
+    'net_profit': 'net_income',
+    'netprofit': 'net_income',
+    'earnings': 'net_income',
+
+    'gross_profit': 'gross_profit',
+    'grossprofit': 'gross_profit',
+    'GrossProfit': 'gross_profit',
+
+    'interest_expense': 'interest_expense',
+    'interestexpense': 'interest_expense',
+    'InterestExpense': 'interest_expense',
+    'interest_paid': 'interest_expense',
+
+    'income_tax_expense': 'income_tax_expense',
+    'incometaxexpense': 'income_tax_expense',
+    'IncomeTaxExpense': 'income_tax_expense',
+    'tax_expense': 'income_tax_expense',
+    'taxes': 'income_tax_expense',
+
+    'total_assets': 'total_assets',
+    'totalassets': 'total_assets',
+    'TotalAssets': 'total_assets',
+
+    'current_assets': 'current_assets',
+    'currentassets': 'current_assets',
+    'CurrentAssets': 'current_assets',
+    'total_current_assets': 'current_assets',
+    'totalcurrentassets': 'current_assets',
+    'TotalCurrentAssets': 'current_assets',
+
+    'cash': 'cash',
+    'Cash': 'cash',
+    'cash_and_cash_equivalents': 'cash',
+    'cashandcashequivalents': 'cash',
+    'CashAndCashEquivalents': 'cash',
+    'cash_and_cash_equivalents_at_carrying_value': 'cash',
+    'cashandcashequivalentsatcarryingvalue': 'cash',
+    'cash_and_short_term_investments': 'cash',
+    'cashandshortterminvestments': 'cash',
+
+    'inventory': 'inventory',
+    'Inventory': 'inventory',
+    'inventories': 'inventory',
+
+    'property_plant_equipment': 'ppe',
+    'propertyplantequipment': 'ppe',
+    'PropertyPlantEquipment': 'ppe',
+    'property_plant_and_equipment': 'ppe',
+    'ppe': 'ppe',
+    'PPE': 'ppe',
+    'fixed_assets': 'ppe',
+
+    'goodwill': 'goodwill',
+    'Goodwill': 'goodwill',
+
+    'intangible_assets': 'intangible_assets',
+    'intangibleassets': 'intangible_assets',
+    'IntangibleAssets': 'intangible_assets',
+
+    'total_liabilities': 'total_liabilities',
+    'totalliabilities': 'total_liabilities',
+    'TotalLiabilities': 'total_liabilities',
+
+    'current_liabilities': 'current_liabilities',
+    'currentliabilities': 'current_liabilities',
+    'CurrentLiabilities': 'current_liabilities',
+    'total_current_liabilities': 'current_liabilities',
+    'totalcurrentliabilities': 'current_liabilities',
+    'TotalCurrentLiabilities': 'current_liabilities',
+
+    'accounts_payable': 'accounts_payable',
+    'accountspayable': 'accounts_payable',
+    'AccountsPayable': 'accounts_payable',
+    'current_accounts_payable': 'accounts_payable',
+    'currentaccountspayable': 'accounts_payable',
+
+    'long_term_debt': 'long_term_debt',
+    'longtermdebt': 'long_term_debt',
+    'LongTermDebt': 'long_term_debt',
+    'long_term_debt_total': 'long_term_debt',
+    'longtermdebtotal': 'long_term_debt',
+    'noncurrent_debt': 'long_term_debt',
+
+    'short_term_debt': 'short_term_debt',
+    'shorttermdebt': 'short_term_debt',
+    'ShortTermDebt': 'short_term_debt',
+    'current_debt': 'short_term_debt',
+    'currentdebt': 'short_term_debt',
+    'short_long_term_debt_total': 'short_term_debt',
+    'shortlongtermdebttotal': 'short_term_debt',
+    'ShortLongTermDebtTotal': 'short_term_debt',
+    'debt_current': 'short_term_debt',
+
+    'total_shareholder_equity': 'total_shareholder_equity',
+    'totalshareholderequity': 'total_shareholder_equity',
+    'TotalShareholderEquity': 'total_shareholder_equity',
+    'total_stockholder_equity': 'total_shareholder_equity',
+    'totalstockholderequity': 'total_shareholder_equity',
+    'TotalStockholderEquity': 'total_shareholder_equity',
+    'shareholder_equity': 'total_shareholder_equity',
+    'shareholderequity': 'total_shareholder_equity',
+    'ShareholderEquity': 'total_shareholder_equity',
+    'stockholder_equity': 'total_shareholder_equity',
+    'stockholderequity': 'total_shareholder_equity',
+    'StockholderEquity': 'total_shareholder_equity',
+    'shareholders_equity': 'total_shareholder_equity',
+    'equity': 'total_shareholder_equity',
+    'Equity': 'total_shareholder_equity',
+    'total_equity': 'total_shareholder_equity',
+    'owners_equity': 'total_shareholder_equity',
+
+    'retained_earnings': 'retained_earnings',
+    'retainedearnings': 'retained_earnings',
+    'RetainedEarnings': 'retained_earnings',
+
+    'common_stock': 'common_stock',
+    'commonstock': 'common_stock',
+    'CommonStock': 'common_stock',
+
+    'operating_cash_flow': 'operating_cashflow',
+    'operatingcashflow': 'operating_cashflow',
+    'OperatingCashFlow': 'operating_cashflow',
+    'cash_flow_from_operations': 'operating_cashflow',
+    'cashflowfromoperations': 'operating_cashflow',
+    'cash_flow_from_operating_activities': 'operating_cashflow',
+    'cashflowfromoperatingactivities': 'operating_cashflow',
+    'operating_activities_cash_flow': 'operating_cashflow',
+    'ocf': 'operating_cashflow',
+    'OCF': 'operating_cashflow',
+
+    'capital_expenditures': 'capital_expenditures',
+    'capitalexpenditures': 'capital_expenditures',
+    'CapitalExpenditures': 'capital_expenditures',
+    'capex': 'capital_expenditures',
+    'CAPEX': 'capital_expenditures',
+    'capital_expenditure': 'capital_expenditures',
+    'payments_for_capital_expenditures': 'capital_expenditures',
+
+    'dividends_paid': 'dividends_paid',
+    'dividendspaid': 'dividends_paid',
+    'DividendsPaid': 'dividends_paid',
+    'dividend_payout': 'dividends_paid',
+    'dividendpayout': 'dividends_paid',
+    'dividends_payout': 'dividends_paid',
+    'dividendspayout': 'dividends_paid',
+    'dividend_payout_common_stock': 'dividends_paid',
+    'dividendpayoutcommonstock': 'dividends_paid',
+
+    'cash_flow_from_financing': 'financing_cashflow',
+    'cashflowfromfinancing': 'financing_cashflow',
+    'CashFlowFromFinancing': 'financing_cashflow',
+    'financing_activities_cash_flow': 'financing_cashflow',
+
+    'cash_flow_from_investment': 'investing_cashflow',
+    'cashflowfrominvestment': 'investing_cashflow',
+    'CashFlowFromInvestment': 'investing_cashflow',
+    'cash_flow_from_investing': 'investing_cashflow',
+    'investing_activities_cash_flow': 'investing_cashflow',
+
+    'depreciation': 'depreciation_amortization',
+    'Depreciation': 'depreciation_amortization',
+    'depreciation_and_amortization': 'depreciation_amortization',
+    'depreciationandamortization': 'depreciation_amortization',
+    'DepreciationAndAmortization': 'depreciation_amortization',
+    'depreciation_amortization': 'depreciation_amortization',
+    'depreciationamortization': 'depreciation_amortization',
+    'd&a': 'depreciation_amortization',
+    'D&A': 'depreciation_amortization',
+
+    'market_capitalization': 'market_cap',
+    'marketcapitalization': 'market_cap',
+    'MarketCapitalization': 'market_cap',
+    'market_cap': 'market_cap',
+    'marketcap': 'market_cap',
+    'MarketCap': 'market_cap',
+
+    'shares_outstanding': 'shares_outstanding',
+    'sharesoutstanding': 'shares_outstanding',
+    'SharesOutstanding': 'shares_outstanding',
+    'common_stock_shares_outstanding': 'shares_outstanding',
+    'commonstocksharesoutstanding': 'shares_outstanding',
+    'CommonStockSharesOutstanding': 'shares_outstanding',
+    'outstanding_shares': 'shares_outstanding',
+
+    'dividend_yield': 'dividend_yield',
+    'dividendyield': 'dividend_yield',
+    'DividendYield': 'dividend_yield',
+
+    'beta': 'beta',
+    'Beta': 'beta',
+
+    'pe_ratio': 'pe_ratio',
+    'peratio': 'pe_ratio',
+    'PERatio': 'pe_ratio',
+    'price_to_earnings': 'pe_ratio',
+    'pricetoearnings': 'pe_ratio',
+    'p/e': 'pe_ratio',
+    'P/E': 'pe_ratio',
+}
+
+
 class AlphaVantageClient:
     
     def __init__(self, cache_manager: Optional[CacheManager] = None):
@@ -75,269 +322,39 @@ class AlphaVantageClient:
         if isinstance(value, (int, float)):
             return float(value)
         
-        try:
-            cleaned = str(value).strip()
-            
-            if cleaned.endswith('%'):
-                cleaned = cleaned.rstrip('%')
-            
-            return float(cleaned)
-            
-        except (ValueError, TypeError, AttributeError):
-            return None
+        return _parse_number_str(str(value))
     
     def _normalize_keys(self, data: Dict) -> Dict:
         if not isinstance(data, dict):
             return data
         
         normalized = {}
-        for key, value in data.items():
-            new_key = key.lower().replace(' ', '_').replace('-', '_')
-            
-            if isinstance(value, dict):
-                normalized[new_key] = self._normalize_keys(value)
-            elif isinstance(value, str):
-                num_value = self._convert_to_number(value)
-                normalized[new_key] = num_value if num_value is not None else value
-            else:
-                normalized[new_key] = value
+        stack = [(data, normalized)]
+        while stack:
+            src, dst = stack.pop()
+            for key, value in src.items():
+                new_key = _normalize_key(key)
+                
+                # Parsed JSON only yields exact dict/str types, so a single
+                # type() lookup replaces the isinstance chain here and in
+                # _convert_to_number
+                value_type = type(value)
+                if value_type is dict:
+                    child = {}
+                    dst[new_key] = child
+                    stack.append((value, child))
+                elif value_type is str:
+                    num_value = _parse_number_str(value)
+                    dst[new_key] = num_value if num_value is not None else value
+                else:
+                    dst[new_key] = value
         
         return normalized
     
     def _map_fields(self, data: Dict) -> Dict:
-
-        field_mappings = {
-            'total_revenue': 'revenue',
-            'totalrevenue': 'revenue',
-            'TotalRevenue': 'revenue',
-            'revenues': 'revenue',
-            'sales': 'revenue',
-            'total_sales': 'revenue',
-            
-            'cost_of_revenue': 'cost_of_revenue',
-            'costofrevenue': 'cost_of_revenue',
-            'CostOfRevenue': 'cost_of_revenue',
-            'cogs': 'cost_of_revenue',
-            'COGS': 'cost_of_revenue',
-            'cost_of_goods_sold': 'cost_of_revenue',
-            'costofgoodssold': 'cost_of_revenue',
-            'CostOfGoodsSold': 'cost_of_revenue',
-            'costofgoodsandservicessold': 'cost_of_revenue',
-            'cost_of_goods_and_services_sold': 'cost_of_revenue',
-            
-            'operating_income': 'operating_income',
-            'operatingincome': 'operating_income',
-            'OperatingIncome': 'operating_income',
-            'ebit': 'operating_income',
-            'EBIT': 'operating_income',
-            'operating_profit': 'operating_income',
-            
-            'net_income': 'net_income',
-            'netincome': 'net_income',
-            'NetIncome': 'net_income',
-            'net_profit': 'net_income',
-            'netprofit': 'net_income',
-            'earnings': 'net_income',
-            
-            'gross_profit': 'gross_profit',
-            'grossprofit': 'gross_profit',
-            'GrossProfit': 'gross_profit',
-            
-            'interest_expense': 'interest_expense',
-            'interestexpense': 'interest_expense',
-            'InterestExpense': 'interest_expense',
-            'interest_paid': 'interest_expense',
-            
-            'income_tax_expense': 'income_tax_expense',
-            'incometaxexpense': 'income_tax_expense',
-            'IncomeTaxExpense': 'income_tax_expense',
-            'tax_expense': 'income_tax_expense',
-            'taxes': 'income_tax_expense',
-            
-            'total_assets': 'total_assets',
-            'totalassets': 'total_assets',
-            'TotalAssets': 'total_assets',
-            
-            'current_assets': 'current_assets',
-            'currentassets': 'current_assets',
-            'CurrentAssets': 'current_assets',
-            'total_current_assets': 'current_assets',
-            'totalcurrentassets': 'current_assets',
-            'TotalCurrentAssets': 'current_assets',
-            
-            'cash': 'cash',
-            'Cash': 'cash',
-            'cash_and_cash_equivalents': 'cash',
-            'cashandcashequivalents': 'cash',
-            'CashAndCashEquivalents': 'cash',
-            'cash_and_cash_equivalents_at_carrying_value': 'cash',
-            'cashandcashequivalentsatcarryingvalue': 'cash',
-            'cash_and_short_term_investments': 'cash',
-            'cashandshortterminvestments': 'cash',
-            
-            'inventory': 'inventory',
-            'Inventory': 'inventory',
-            'inventories': 'inventory',
-            
-            'property_plant_equipment': 'ppe',
-            'propertyplantequipment': 'ppe',
-            'PropertyPlantEquipment': 'ppe',
-            'property_plant_and_equipment': 'ppe',
-            'ppe': 'ppe',
-            'PPE': 'ppe',
-            'fixed_assets': 'ppe',
-            
-            'goodwill': 'goodwill',
-            'Goodwill': 'goodwill',
-            
-            'intangible_assets': 'intangible_assets',
-            'intangibleassets': 'intangible_assets',
-            'IntangibleAssets': 'intangible_assets',
-            
-            'total_liabilities': 'total_liabilities',
-            'totalliabilities': 'total_liabilities',
-            'TotalLiabilities': 'total_liabilities',
-            
-            'current_liabilities': 'current_liabilities',
-            'currentliabilities': 'current_liabilities',
-            'CurrentLiabilities': 'current_liabilities',
-            'total_current_liabilities': 'current_liabilities',
-            'totalcurrentliabilities': 'current_liabilities',
-            'TotalCurrentLiabilities': 'current_liabilities',
-            
-            'accounts_payable': 'accounts_payable',
-            'accountspayable': 'accounts_payable',
-            'AccountsPayable': 'accounts_payable',
-            'current_accounts_payable': 'accounts_payable',
-            'currentaccountspayable': 'accounts_payable',
-            
-            'long_term_debt': 'long_term_debt',
-            'longtermdebt': 'long_term_debt',
-            'LongTermDebt': 'long_term_debt',
-            'long_term_debt_total': 'long_term_debt',
-            'longtermdebtotal': 'long_term_debt',
-            'noncurrent_debt': 'long_term_debt',
-            
-            'short_term_debt': 'short_term_debt',
-            'shorttermdebt': 'short_term_debt',
-            'ShortTermDebt': 'short_term_debt',
-            'current_debt': 'short_term_debt',
-            'currentdebt': 'short_term_debt',
-            'short_long_term_debt_total': 'short_term_debt',
-            'shortlongtermdebttotal': 'short_term_debt',
-            'ShortLongTermDebtTotal': 'short_term_debt',
-            'debt_current': 'short_term_debt',
-            
-            'total_shareholder_equity': 'total_shareholder_equity',
-            'totalshareholderequity': 'total_shareholder_equity',
-            'TotalShareholderEquity': 'total_shareholder_equity',
-            'total_stockholder_equity': 'total_shareholder_equity',
-            'totalstockholderequity': 'total_shareholder_equity',
-            'TotalStockholderEquity': 'total_shareholder_equity',
-            'shareholder_equity': 'total_shareholder_equity',
-            'shareholderequity': 'total_shareholder_equity',
-            'ShareholderEquity': 'total_shareholder_equity',
-            'stockholder_equity': 'total_shareholder_equity',
-            'stockholderequity': 'total_shareholder_equity',
-            'StockholderEquity': 'total_shareholder_equity',
-            'shareholders_equity': 'total_shareholder_equity',
-            'equity': 'total_shareholder_equity',
-            'Equity': 'total_shareholder_equity',
-            'total_equity': 'total_shareholder_equity',
-            'owners_equity': 'total_shareholder_equity',
-            
-            'retained_earnings': 'retained_earnings',
-            'retainedearnings': 'retained_earnings',
-            'RetainedEarnings': 'retained_earnings',
-            
-            'common_stock': 'common_stock',
-            'commonstock': 'common_stock',
-            'CommonStock': 'common_stock',
-            
-            'operating_cash_flow': 'operating_cashflow',
-            'operatingcashflow': 'operating_cashflow',
-            'OperatingCashFlow': 'operating_cashflow',
-            'cash_flow_from_operations': 'operating_cashflow',
-            'cashflowfromoperations': 'operating_cashflow',
-            'cash_flow_from_operating_activities': 'operating_cashflow',
-            'cashflowfromoperatingactivities': 'operating_cashflow',
-            'operating_activities_cash_flow': 'operating_cashflow',
-            'ocf': 'operating_cashflow',
-            'OCF': 'operating_cashflow',
-            
-            'capital_expenditures': 'capital_expenditures',
-            'capitalexpenditures': 'capital_expenditures',
-            'CapitalExpenditures': 'capital_expenditures',
-            'capex': 'capital_expenditures',
-            'CAPEX': 'capital_expenditures',
-            'capital_expenditure': 'capital_expenditures',
-            'payments_for_capital_expenditures': 'capital_expenditures',
-            
-            'dividends_paid': 'dividends_paid',
-            'dividendspaid': 'dividends_paid',
-            'DividendsPaid': 'dividends_paid',
-            'dividend_payout': 'dividends_paid',
-            'dividendpayout': 'dividends_paid',
-            'dividends_payout': 'dividends_paid',
-            'dividendspayout': 'dividends_paid',
-            'dividend_payout_common_stock': 'dividends_paid',
-            'dividendpayoutcommonstock': 'dividends_paid',
-            
-            'cash_flow_from_financing': 'financing_cashflow',
-            'cashflowfromfinancing': 'financing_cashflow',
-            'CashFlowFromFinancing': 'financing_cashflow',
-            'financing_activities_cash_flow': 'financing_cashflow',
-            
-            'cash_flow_from_investment': 'investing_cashflow',
-            'cashflowfrominvestment': 'investing_cashflow',
-            'CashFlowFromInvestment': 'investing_cashflow',
-            'cash_flow_from_investing': 'investing_cashflow',
-            'investing_activities_cash_flow': 'investing_cashflow',
-
-            'depreciation': 'depreciation_amortization',
-            'Depreciation': 'depreciation_amortization',
-            'depreciation_and_amortization': 'depreciation_amortization',
-            'depreciationandamortization': 'depreciation_amortization',
-            'DepreciationAndAmortization': 'depreciation_amortization',
-            'depreciation_amortization': 'depreciation_amortization',
-            'depreciationamortization': 'depreciation_amortization',
-            'd&a': 'depreciation_amortization',
-            'D&A': 'depreciation_amortization',
-            
-            'market_capitalization': 'market_cap',
-            'marketcapitalization': 'market_cap',
-            'MarketCapitalization': 'market_cap',
-            'market_cap': 'market_cap',
-            'marketcap': 'market_cap',
-            'MarketCap': 'market_cap',
-            
-            'shares_outstanding': 'shares_outstanding',
-            'sharesoutstanding': 'shares_outstanding',
-            'SharesOutstanding': 'shares_outstanding',
-            'common_stock_shares_outstanding': 'shares_outstanding',
-            'commonstocksharesoutstanding': 'shares_outstanding',
-            'CommonStockSharesOutstanding': 'shares_outstanding',
-            'outstanding_shares': 'shares_outstanding',
-            
-            'dividend_yield': 'dividend_yield',
-            'dividendyield': 'dividend_yield',
-            'DividendYield': 'dividend_yield',
-            
-            'beta': 'beta',
-            'Beta': 'beta',
-            
-            'pe_ratio': 'pe_ratio',
-            'peratio': 'pe_ratio',
-            'PERatio': 'pe_ratio',
-            'price_to_earnings': 'pe_ratio',
-            'pricetoearnings': 'pe_ratio',
-            'p/e': 'pe_ratio',
-            'P/E': 'pe_ratio',
-        }
-        
         mapped_data = {}
         for key, value in data.items():
-            mapped_key = field_mappings.get(key, key)
+            mapped_key = _FIELD_MAPPINGS.get(key, key)
             mapped_data[mapped_key] = value
         
         return mapped_data
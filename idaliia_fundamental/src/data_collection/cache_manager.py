@@ -35,11 +35,13 @@ class CacheManager:
         return os.path.join(symbol_dir, filename)
     
     def _is_cache_valid(self, filepath: str, function: str) -> bool:
-        if not os.path.exists(filepath):
+        try:
+            mtime = os.stat(filepath).st_mtime
+        except OSError:
             return False
 
         ttl = self._get_ttl_for_function(function)
-        file_age = time.time() - os.path.getmtime(filepath)
+        file_age = time.time() - mtime
         return file_age < ttl
     
     def get(self, symbol: str, function: str) -> Optional[Any]:
@@ -13,6 +13,10 @@ from config.settings import (
     MAX_PEERS
 )
 
+# Industry keys lower-cased once so lookups only lower-case the query
+_INDUSTRY_PEERS_LOWER = tuple((ind.lower(), tickers) for ind, tickers in INDUSTRY_PEERS.items())
+_RELATED_INDUSTRIES_LOWER = tuple((ind.lower(), related) for ind, related in RELATED_INDUSTRIES.items())
+
 
 class PeerSelector:
     
@@ -64,20 +68,23 @@ class PeerSelector:
     
     def _find_industry_peers(self, industry: str, exclude_ticker: str) -> List[str]:
         industry_lower = industry.lower()
-        for ind, tickers in INDUSTRY_PEERS.items():
-            if ind.lower() in industry_lower or industry_lower in ind.lower():
-                return [t for t in tickers if t.upper() != exclude_ticker.upper()]
+        for ind_lower, tickers in _INDUSTRY_PEERS_LOWER:
+            if ind_lower in industry_lower or industry_lower in ind_lower:
+                exclude = exclude_ticker.upper()
+                return [t for t in tickers if t.upper() != exclude]
         return []
     
     def _find_related_industry_peers(self, industry: str, exclude_ticker: str) -> List[str]:
         industry_lower = industry.lower()
         peers = []
-        for ind, related in RELATED_INDUSTRIES.items():
-            if ind.lower() in industry_lower or industry_lower in ind.lower():
+        for ind_lower, related in _RELATED_INDUSTRIES_LOWER:
+            if ind_lower in industry_lower or industry_lower in ind_lower:
                 for related_ind in related:
                     if related_ind in INDUSTRY_PEERS:
                         peers.extend(INDUSTRY_PEERS[related_ind])
-        return [t for t in peers if t.upper() != exclude_ticker.upper()]
+        # Related industries can share tickers; dedupe in order so each is fetched once
+        exclude = exclude_ticker.upper()
+        return list(dict.fromkeys(t for t in peers if t.upper() != exclude))
     
     def _calculate_market_cap_score(self, target_cap: float, peer_cap: float) -> float:
         if not target_cap or not peer_cap:
@@ -144,6 +151,7 @@ class PeerSelector:
         print(f"   Step 1: Found {len(main_industry_tickers)} candidates from {industry}")
 
         main_candidates = []
+        related_candidates = []
         for ticker in main_industry_tickers:
             data = self._get_yahoo_data(ticker)
             if data:
@@ -155,10 +163,10 @@ class PeerSelector:
         if len(filtered) < max_peers:
             print(f"   Step 3: Need more peers, checking related industries...")
             related_tickers = self._find_related_industry_peers(industry, target_ticker)
-            related_tickers = [t for t in related_tickers if t not in main_industry_tickers]
+            main_set = set(main_industry_tickers)
+            related_tickers = [t for t in related_tickers if t not in main_set]
             print(f"   Step 3: Found {len(related_tickers)} candidates from related industries")
 
-            related_candidates = []
             for ticker in related_tickers:
                 data = self._get_yahoo_data(ticker)
                 if data:
@@ -170,7 +178,8 @@ class PeerSelector:
 
         if len(filtered) < max_peers:
             print(f"   Step 4: Only {len(filtered)} peers, trying relaxed filter on all...")
-            all_candidates = main_candidates + [c for c in related_candidates if c not in main_candidates] if 'related_candidates' in dir() else main_candidates
+            # Related tickers already exclude the main industry list, so no overlap to filter
+            all_candidates = main_candidates + related_candidates
             filtered = self._filter_candidates(all_candidates, target_cap, strict=False)
             print(f"   Step 4: {len(filtered)} peers with relaxed filter")
 
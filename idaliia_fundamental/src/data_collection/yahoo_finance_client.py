@@ -9,6 +9,15 @@ logger = logging.getLogger(__name__)
 
 DEFAULT_RISK_FREE_RATE = 0.042
 
+# Analyst grade buckets, checked in order; the first keyword match wins.
+_GRADE_BUCKETS = (
+    ('strong_buy', ('strong buy',)),
+    ('buy', ('buy',)),
+    ('hold', ('hold', 'neutral')),
+    ('strong_sell', ('strong sell',)),
+    ('sell', ('sell',)),
+)
+
 
 class YahooFinanceClient:
     
@@ -124,18 +133,18 @@ class YahooFinanceClient:
                 'total': len(recent),
             }
             
-            for _, row in recent.iterrows():
-                grade = str(row.get('To Grade', '')).lower()
-                if 'strong buy' in grade:
-                    summary['strong_buy'] += 1
-                elif 'buy' in grade:
-                    summary['buy'] += 1
-                elif 'hold' in grade or 'neutral' in grade:
-                    summary['hold'] += 1
-                elif 'strong sell' in grade:
-                    summary['strong_sell'] += 1
-                elif 'sell' in grade:
-                    summary['sell'] += 1
+            if 'To Grade' not in recent.columns:
+                return summary
+            
+            # Lowercase the column once and bucket it with vectorized
+            # substring tests instead of walking rows with iterrows()
+            grades = recent['To Grade'].astype(str).str.lower()
+            for key, keywords in _GRADE_BUCKETS:
+                hit = grades.str.contains(keywords[0], regex=False).to_numpy()
+                for keyword in keywords[1:]:
+                    hit |= grades.str.contains(keyword, regex=False).to_numpy()
+                summary[key] = int(hit.sum())
+                grades = grades[~hit]
             
             return summary
             
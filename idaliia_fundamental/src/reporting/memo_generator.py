@@ -2,12 +2,425 @@
 HTML investment memo generator with LLM-powered analysis.
 """
 
+import functools
 from typing import Dict, List
 from datetime import datetime
 from openai import OpenAI
 from config.settings import OPENAI_API_KEY, LLM_MODEL, LLM_TEMPERATURE
 
 
+# Section 3.1 ratio table: (label, ratio key, formatter method, show rating)
+_HISTORICAL_METRICS = (
+    ('PROFITABILITY', (
+        ('Gross Margin', 'gross_margin', '_pct', True),
+        ('Operating Margin', 'operating_margin', '_pct', True),
+        ('Net Profit Margin', 'net_margin', '_pct', True),
+        ('ROE', 'roe', '_pct', True),
+        ('ROA', 'roa', '_pct', True),
+        ('ROIC', 'roic', '_pct', True),
+    )),
+    ('LEVERAGE', (
+        ('Debt/Assets', 'debt_to_assets', '_mult', True),
+        ('Debt/Equity', 'debt_to_equity', '_mult', True),
+        ('Interest Coverage', 'interest_coverage', '_mult', True),
+    )),
+    ('LIQUIDITY', (
+        ('Current Ratio', 'current_ratio', '_mult', True),
+        ('Quick Ratio', 'quick_ratio', '_mult', True),
+    )),
+)
+
+
+# Appendix A/B tables only depend on config.settings, so the prose lives in
+# module-level templates and the formatted config values are built once.
+_APPENDIX_A_TEMPLATE = """
+        <h2>Appendix A: Scoring Methodology</h2>
+        
+        <p>The recommendation is based on valuation upside—the percentage difference between the calculated Target Price and Current Price. The Target Price is a weighted blend of three valuation methods, with weights determined by company classification.</p>
+        
+        <h3>Step 1: Calculate Target Price</h3>
+        
+        <table>
+            <thead>
+                <tr>
+                    <th>Method</th>
+                    <th>Description</th>
+                </tr>
+            </thead>
+            <tbody>
+                <tr>
+                    <td><strong>DCF</strong></td>
+                    <td>Intrinsic value based on projected free cash flows discounted to present value</td>
+                </tr>
+                <tr>
+                    <td><strong>Multiples</strong></td>
+                    <td>Fair value based on P/E, EV/EBITDA, and P/B multiples vs peer companies</td>
+                </tr>
+                <tr>
+                    <td><strong>DDM</strong></td>
+                    <td>Value based on expected dividend stream using Gordon Growth Model</td>
+                </tr>
+            </tbody>
+        </table>
+        
+        <h3>Valuation Weights by Company Type</h3>
+        
+        <table>
+            <thead>
+                <tr>
+                    <th>Company Type</th>
+                    <th class="text-center">DCF</th>
+                    <th class="text-center">Multiples</th>
+                    <th class="text-center">DDM</th>
+                </tr>
+            </thead>
+            <tbody>
+                <tr>
+                    <td>Growth</td>
+                    <td class="text-center">{growth_dcf}%</td>
+                    <td class="text-center">{growth_multiples}%</td>
+                    <td class="text-center">{growth_ddm}%</td>
+                </tr>
+                <tr>
+                    <td>Balanced</td>
+                    <td class="text-center">{balanced_dcf}%</td>
+                    <td class="text-center">{balanced_multiples}%</td>
+                    <td class="text-center">{balanced_ddm}%</td>
+                </tr>
+                <tr>
+                    <td>Dividend</td>
+                    <td class="text-center">{dividend_dcf}%</td>
+                    <td class="text-center">{dividend_multiples}%</td>
+                    <td class="text-center">{dividend_ddm}%</td>
+                </tr>
+                <tr>
+                    <td>Cyclical</td>
+                    <td class="text-center">{cyclical_dcf}%</td>
+                    <td class="text-center">{cyclical_multiples}%</td>
+                    <td class="text-center">{cyclical_ddm}%</td>
+                </tr>
+            </tbody>
+        </table>
+        
+        <h3>Step 2: Calculate Upside</h3>
+        <p><code>Upside = (Target Price - Current Price) / Current Price × 100%</code></p>
+        
+        <h3>Step 3: Gate Checks (Safety Filters)</h3>
+        
+        <table>
+            <thead>
+                <tr>
+                    <th>Gate</th>
+                    <th class="text-center">Threshold</th>
+                    <th class="text-center">Severity</th>
+                </tr>
+            </thead>
+            <tbody>
+                <tr>
+                    <td>Interest Coverage</td>
+                    <td class="text-center">≥ {min_interest_coverage}x</td>
+                    <td class="text-center">CRITICAL</td>
+                </tr>
+                <tr>
+                    <td>Current Ratio</td>
+                    <td class="text-center">≥ {min_current_ratio}x</td>
+                    <td class="text-center">HIGH</td>
+                </tr>
+                <tr>
+                    <td>Debt/Equity</td>
+                    <td class="text-center">≤ 5.0x</td>
+                    <td class="text-center">HIGH</td>
+                </tr>
+            </tbody>
+        </table>
+        
+        <h3>Step 4: Recommendation Logic</h3>
+        
+        <table>
+            <thead>
+                <tr>
+                    <th>Condition</th>
+                    <th>Recommendation</th>
+                </tr>
+            </thead>
+            <tbody>
+                <tr>
+                    <td>Upside &gt; {buy_threshold}% AND no HIGH/CRITICAL gates</td>
+                    <td><strong>BUY</strong></td>
+                </tr>
+                <tr>
+                    <td>Upside &gt; {buy_threshold}% BUT has HIGH gate</td>
+                    <td><strong>HOLD</strong></td>
+                </tr>
+                <tr>
+                    <td>{sell_threshold}% &lt; Upside &lt; {buy_threshold}%</td>
+                    <td><strong>HOLD</strong></td>
+                </tr>
+                <tr>
+                    <td>Upside &lt; {sell_threshold}%</td>
+                    <td><strong>SELL</strong></td>
+                </tr>
+                <tr>
+                    <td>Any CRITICAL gate triggered</td>
+                    <td><strong>SELL</strong></td>
+                </tr>
+            </tbody>
+        </table>
+        """
+
+_APPENDIX_B_TEMPLATE = """
+        <h2>Appendix B: Company Classification Framework</h2>
+        
+        <p>Companies are classified into four types based on dividend yield, revenue growth, and sector. Each type uses different valuation weights optimized for its characteristics.</p>
+        
+        <h3>Classification Criteria & Valuation Weights</h3>
+        
+        <table>
+            <thead>
+                <tr>
+                    <th>Type</th>
+                    <th>Criteria</th>
+                    <th class="text-center">DCF</th>
+                    <th class="text-center">Multiples</th>
+                    <th class="text-center">DDM</th>
+                    <th>Typical Sectors</th>
+                </tr>
+            </thead>
+            <tbody>
+                <tr>
+                    <td><strong>Growth</strong></td>
+                    <td>Dividend &lt;2%, Revenue Growth &gt;15%</td>
+                    <td class="text-center">{growth_dcf}%</td>
+                    <td class="text-center">{growth_multiples}%</td>
+                    <td class="text-center">{growth_ddm}%</td>
+                    <td>Technology, Biotech, Software, Semiconductors</td>
+                </tr>
+                <tr>
+                    <td><strong>Balanced</strong></td>
+                    <td>Dividend 2-4%, Revenue Growth 10-15%</td>
+                    <td class="text-center">{balanced_dcf}%</td>
+                    <td class="text-center">{balanced_multiples}%</td>
+                    <td class="text-center">{balanced_ddm}%</td>
+                    <td>Healthcare, Financials, Industrials</td>
+                </tr>
+                <tr>
+                    <td><strong>Dividend</strong></td>
+                    <td>Dividend &gt;4%, Revenue Growth &lt;10%</td>
+                    <td class="text-center">{dividend_dcf}%</td>
+                    <td class="text-center">{dividend_multiples}%</td>
+                    <td class="text-center">{dividend_ddm}%</td>
+                    <td>Utilities, REITs, Telecom, Consumer Staples</td>
+                </tr>
+                <tr>
+                    <td><strong>Cyclical</strong></td>
+                    <td>Sector-based classification</td>
+                    <td class="text-center">{cyclical_dcf}%</td>
+                    <td class="text-center">{cyclical_multiples}%</td>
+                    <td class="text-center">{cyclical_ddm}%</td>
+                    <td>Energy, Materials, Chemicals, Automotive</td>
+                </tr>
+            </tbody>
+        </table>
+        
+        <h3>Classification Logic</h3>
+        
+        <table>
+            <thead>
+                <tr>
+                    <th>Step</th>
+                    <th>Check</th>
+                    <th>Result</th>
+                </tr>
+            </thead>
+            <tbody>
+                <tr>
+                    <td>1</td>
+                    <td>Sector in [Energy, Materials, Chemicals, Automotive]</td>
+                    <td>→ <strong>CYCLICAL</strong></td>
+                </tr>
+                <tr>
+                    <td>2</td>
+                    <td>Dividend Yield &gt; 4%</td>
+                    <td>→ <strong>DIVIDEND</strong></td>
+                </tr>
+                <tr>
+                    <td>3</td>
+                    <td>Revenue Growth &gt; 15% AND Dividend &lt; 2%</td>
+                    <td>→ <strong>GROWTH</strong></td>
+                </tr>
+                <tr>
+                    <td>4</td>
+                    <td>All other cases</td>
+                    <td>→ <strong>BALANCED</strong></td>
+                </tr>
+            </tbody>
+        </table>
+        
+        <h3>Weighting Rationale</h3>
+        
+        <table>
+            <thead>
+                <tr>
+                    <th>Method</th>
+                    <th>Best For</th>
+                    <th>Limitations</th>
+                </tr>
+            </thead>
+            <tbody>
+                <tr>
+                    <td><strong>DCF</strong></td>
+                    <td>Companies with visible, sustainable cash flows</td>
+                    <td>Less reliable for high-growth (forecast uncertainty) and cyclical (volatile earnings)</td>
+                </tr>
+                <tr>
+                    <td><strong>Multiples</strong></td>
+                    <td>Peer benchmarking when sector dynamics drive valuation</td>
+                    <td>Requires comparable peers; can reflect market mispricing</td>
+                </tr>
+                <tr>
+                    <td><strong>DDM</strong></td>
+                    <td>Companies with established, stable dividend policies</td>
+                    <td>Not applicable for non-dividend or variable dividend companies</td>
+                </tr>
+            </tbody>
+        </table>
+        """
+
+
+@functools.lru_cache(maxsize=1)
+def _appendix_context() -> Dict[str, str]:
+    from config.settings import (
+        COMPANY_TYPE_WEIGHTS,
+        BUY_THRESHOLD,
+        SELL_THRESHOLD,
+        MIN_INTEREST_COVERAGE,
+        MIN_CURRENT_RATIO
+    )
+    
+    ctx = {
+        'min_interest_coverage': f"{MIN_INTEREST_COVERAGE}",
+        'min_current_ratio': f"{MIN_CURRENT_RATIO}",
+        'buy_threshold': f"{BUY_THRESHOLD*100:+.0f}",
+        'sell_threshold': f"{SELL_THRESHOLD*100:.0f}",
+    }
+    for company_type in ('growth', 'balanced', 'dividend', 'cyclical'):
+        weights = COMPANY_TYPE_WEIGHTS.get(company_type, {})
+        for method in ('dcf', 'multiples', 'ddm'):
+            ctx[f'{company_type}_{method}'] = f"{weights.get(method, 0)*100:.0f}"
+    return ctx
+
+
+# Sector-specific risk row, matched by lowercase substring of the sector name
+_SECTOR_RISKS = (
+    ('technology', ('Medium', 'Competitive', 'Rapid innovation cycle; market share vulnerable')),
+    ('energy', ('Medium', 'Regulatory', 'Export controls; geopolitical restrictions')),
+    ('financial services', ('Medium', 'Regulatory', 'Regulatory changes may impact profitability')),
+)
+
+_SEVERITY_ORDER = {'High': 0, 'Medium': 1, 'Low': 2}
+
+_DUPONT_INSUFFICIENT = "Insufficient data for DuPont analysis."
+
+
+# Cell formatters shared by the DuPont and scenario tables
+def _fmt_pct(v):
+    return f"{v*100:.1f}%" if v is not None else "N/A"
+
+
+def _fmt_mult(v):
+    return f"{v:.2f}x" if v is not None else "N/A"
+
+
+def _fmt_price(v):
+    return f"${v:,.2f}" if v else "N/A"
+
+
+def _fmt_upside(v):
+    if v is None:
+        return "N/A"
+    return f"{v*100:+.1f}%"
+
+
+def _upside_class(upside):
+    if upside is None:
+        return ''
+    if upside > 0.15:
+        return 'class="positive"'
+    elif upside < -0.10:
+        return 'class="negative"'
+    return ''
+
+
+# Financial health ratings (page 3.2)
+def _rate_profitability(gross_margin, net_margin, roe, roa):
+    score = 0
+    if gross_margin and gross_margin > 0.40: score += 1
+    if net_margin and net_margin > 0.10: score += 1
+    if roe and roe > 0.15: score += 1
+    if roa and roa > 0.10: score += 1
+    
+    if score >= 3:
+        return "Strong"
+    elif score >= 2:
+        return "Acceptable"
+    else:
+        return "Weak"
+
+
+def _rate_leverage(debt_to_equity):
+    if debt_to_equity is None or debt_to_equity == 0:
+        return "Strong"
+
+    if debt_to_equity < 0.5:
+        return "Strong"
+    elif debt_to_equity < 1.0:
+        return "Acceptable"
+    elif debt_to_equity < 2.0:
+        return "Elevated"
+    else:
+        return "Weak"
+
+
+def _rate_liquidity(current_ratio):
+    if not current_ratio or current_ratio < 1.0:
+        return "Weak"
+    elif current_ratio < 1.5:
+        return "Adequate"
+    else:
+        return "Strong"
+
+
+# Only a handful of rating combinations exist, so the table HTML is cached
+@functools.lru_cache(maxsize=None)
+def _financial_health_html(profitability_rating, leverage_rating, liquidity_rating):
+    return f'''
+            <h3>3.2 FINANCIAL HEALTH ASSESSMENT</h3>
+            
+            <table>
+                <thead>
+                    <tr>
+                        <th style="text-align: left;">CATEGORY</th>
+                        <th>RATING</th>
+                    </tr>
+                </thead>
+                <tbody>
+                    <tr>
+                        <td>Profitability</td>
+                        <td><strong>{profitability_rating}</strong></td>
+                    </tr>
+                    <tr>
+                        <td>Leverage</td>
+                        <td><strong>{leverage_rating}</strong></td>
+                    </tr>
+                    <tr>
+                        <td>Liquidity</td>
+                        <td><strong>{liquidity_rating}</strong></td>
+                    </tr>
+                </tbody>
+            </table>
+        '''
+
+
 class MemoGenerator:
     
     def __init__(self, ticker: str, company_data: Dict, ratios: Dict, classification: Dict,
@@ -38,6 +451,9 @@ class MemoGenerator:
     
     
     def _safe(self, val, default=0.0):
+        # Most ratios are already floats; skip the comparison and try/except
+        if type(val) is float:
+            return val
         if val is None or val == "N/A":
             return default
         try:
@@ -567,87 +983,19 @@ class MemoGenerator:
                 return 'Strong'
             elif val >= 1.0:
                 return 'Acceptable'
-            else:
-                return 'Weak'
-        
-        return 'N/A'
-    
-    def _financial_health_table(self) -> str:
-        gross_margin = self.ratios.get('gross_margin', 0)
-        net_margin = self.ratios.get('net_margin', 0)
-        roe = self.ratios.get('roe', 0)
-        roa = self.ratios.get('roa', 0)
-
-        debt_to_equity = self.ratios.get('debt_to_equity', 0)
-        current_ratio = self.ratios.get('current_ratio')
-        
-        def rate_profitability():
-            score = 0
-            if gross_margin and gross_margin > 0.40: score += 1
-            if net_margin and net_margin > 0.10: score += 1
-            if roe and roe > 0.15: score += 1
-            if roa and roa > 0.10: score += 1
-            
-            if score >= 3:
-                return "Strong"
-            elif score >= 2:
-                return "Acceptable"
-            else:
-                return "Weak"
-        
-        def rate_leverage():
-            if debt_to_equity is None or debt_to_equity == 0:
-                return "Strong"
-
-            if debt_to_equity < 0.5:
-                return "Strong"
-            elif debt_to_equity < 1.0:
-                return "Acceptable"
-            elif debt_to_equity < 2.0:
-                return "Elevated"
-            else:
-                return "Weak"
-        
-        def rate_liquidity():
-            if not current_ratio or current_ratio < 1.0:
-                return "Weak"
-            elif current_ratio < 1.5:
-                return "Adequate"
-            else:
-                return "Strong"
-        
-        profitability_rating = rate_profitability()
-        leverage_rating = rate_leverage()
-        liquidity_rating = rate_liquidity()
-        
-        html = f'''
-            <h3>3.2 FINANCIAL HEALTH ASSESSMENT</h3>
-            
-            <table>
-                <thead>
-                    <tr>
-                        <th style="text-align: left;">CATEGORY</th>
-                        <th>RATING</th>
-                    </tr>
-                </thead>
-                <tbody>
-                    <tr>
-                        <td>Profitability</td>
-                        <td><strong>{profitability_rating}</strong></td>
-                    </tr>
-                    <tr>
-                        <td>Leverage</td>
-                        <td><strong>{leverage_rating}</strong></td>
-                    </tr>
-                    <tr>
-                        <td>Liquidity</td>
-                        <td><strong>{liquidity_rating}</strong></td>
-                    </tr>
-                </tbody>
-            </table>
-        '''
+            else:
+                return 'Weak'
         
-        return html
+        return 'N/A'
+    
+    def _financial_health_table(self) -> str:
+        ratios = self.ratios
+        return _financial_health_html(
+            _rate_profitability(ratios.get('gross_margin', 0), ratios.get('net_margin', 0),
+                                ratios.get('roe', 0), ratios.get('roa', 0)),
+            _rate_leverage(ratios.get('debt_to_equity', 0)),
+            _rate_liquidity(ratios.get('current_ratio')),
+        )
 
     def _generate_financial_narrative(self) -> str:
         if not self.client:
@@ -840,7 +1188,7 @@ Write ONLY the description. No preamble."""
     
 
     def _page3_financial_analysis(self) -> str:
-        html = '''
+        parts = ['''
         <h2>3. Financial Analysis</h2>
         
         <h3>3.1 FINANCIAL RATIOS</h3>
@@ -858,7 +1206,7 @@ Write ONLY the description. No preamble."""
                 </tr>
             </thead>
             <tbody>
-        '''
+        ''']
         
         historical = self._get_historical_ratios()
         
@@ -867,73 +1215,47 @@ Write ONLY the description. No preamble."""
         
         historical = historical[-5:]
         
-        metrics = [
-            ('PROFITABILITY', [
-                ('Gross Margin', 'gross_margin', True),
-                ('Operating Margin', 'operating_margin', True),
-                ('Net Profit Margin', 'net_margin', True),
-                ('ROE', 'roe', True),
-                ('ROA', 'roa', True),
-                ('ROIC', 'roic', True),
-            ]),
-            ('LEVERAGE', [
-                ('Debt/Assets', 'debt_to_assets', True),
-                ('Debt/Equity', 'debt_to_equity', True),
-                ('Interest Coverage', 'interest_coverage', True),
-            ]),
-            ('LIQUIDITY', [
-                ('Current Ratio', 'current_ratio', True),
-                ('Quick Ratio', 'quick_ratio', True),
-            ]),
-        ]
-        
-        for section_name, section_metrics in metrics:
-            html += f'''
+        for section_name, section_metrics in _HISTORICAL_METRICS:
+            parts.append(f'''
                     <tr class="section-header">
                         <td colspan="7"><strong>{section_name}</strong></td>
                     </tr>
-            '''
+            ''')
             
-            for metric_name, metric_key, show_rating in section_metrics:
-                html += f'<tr><td>{metric_name}</td>'
+            for metric_name, metric_key, fmt_name, show_rating in section_metrics:
+                fmt = getattr(self, fmt_name)
                 
-                for year_data in historical:
-                    val = year_data.get(metric_key)
-                    if val is None:
-                        html += '<td>N/A</td>'
-                    elif metric_key in ['gross_margin', 'operating_margin', 'net_margin', 'roe', 'roa', 'roic']:
-                        html += f'<td>{self._pct(val)}</td>'
-                    elif metric_key in ['current_ratio', 'quick_ratio', 'interest_coverage', 'debt_to_assets', 'debt_to_equity']:
-                        html += f'<td>{self._mult(val)}</td>'
-                    else:
-                        html += f'<td>{val}</td>'
+                cells = ''.join(
+                    '<td>N/A</td>' if val is None else f'<td>{fmt(val)}</td>'
+                    for val in [year_data.get(metric_key) for year_data in historical]
+                )
                 
                 if show_rating:
                     current_val = self.ratios.get(metric_key)
                     rating = self._rate_gate_check_metric(metric_key, current_val)
-                    html += f'<td><span class="rating-{rating.lower()}">{rating}</span></td>'
+                    rating_cell = f'<td><span class="rating-{rating.lower()}">{rating}</span></td>'
                 else:
-                    html += '<td>—</td>'
+                    rating_cell = '<td>—</td>'
                 
-                html += '</tr>'
+                parts.append(f'<tr><td>{metric_name}</td>{cells}{rating_cell}</tr>')
         
-        html += '''
+        parts.append('''
                 </tbody>
             </table>
-        '''
+        ''')
         
-        html += self._financial_health_table()
+        parts.append(self._financial_health_table())
         
-        html += self._dupont_analysis_section()
+        parts.append(self._dupont_analysis_section())
         
         narrative = self._generate_financial_narrative()
-        html += f'''
+        parts.append(f'''
             <p style="text-align: justify; line-height: 1.6;">
                 {narrative}
             </p>
-        '''
+        ''')
         
-        return html
+        return ''.join(parts)
     
     def _dupont_analysis_section(self) -> str:
         from src.analysis.financial_ratios import FinancialRatiosCalculator
@@ -946,12 +1268,6 @@ Write ONLY the description. No preamble."""
         equity_multiplier = dupont.get('equity_multiplier')
         actual_roe = dupont.get('actual_roe')
 
-        def fmt_pct(v):
-            return f"{v*100:.1f}%" if v is not None else "N/A"
-
-        def fmt_mult(v):
-            return f"{v:.2f}x" if v is not None else "N/A"
-
         driver_analysis = self._generate_dupont_analysis(
             net_margin, asset_turnover, equity_multiplier, actual_roe
         )
@@ -959,7 +1275,7 @@ Write ONLY the description. No preamble."""
         html = f'''
             <h3>3.3 DUPONT ANALYSIS</h3>
 
-            <p><strong>ROE Decomposition:</strong> {fmt_pct(actual_roe)} = {fmt_pct(net_margin)} × {fmt_mult(asset_turnover)} × {fmt_mult(equity_multiplier)}</p>
+            <p><strong>ROE Decomposition:</strong> {_fmt_pct(actual_roe)} = {_fmt_pct(net_margin)} × {_fmt_mult(asset_turnover)} × {_fmt_mult(equity_multiplier)}</p>
 
             <table>
                 <thead>
@@ -973,22 +1289,22 @@ Write ONLY the description. No preamble."""
                     <tr>
                         <td><strong>Net Profit Margin</strong></td>
                         <td>Net Income / Revenue</td>
-                        <td class="text-right">{fmt_pct(net_margin)}</td>
+                        <td class="text-right">{_fmt_pct(net_margin)}</td>
                     </tr>
                     <tr>
                         <td><strong>Asset Turnover</strong></td>
                         <td>Revenue / Assets</td>
-                        <td class="text-right">{fmt_mult(asset_turnover)}</td>
+                        <td class="text-right">{_fmt_mult(asset_turnover)}</td>
                     </tr>
                     <tr>
                         <td><strong>Equity Multiplier</strong></td>
                         <td>Assets / Equity</td>
-                        <td class="text-right">{fmt_mult(equity_multiplier)}</td>
+                        <td class="text-right">{_fmt_mult(equity_multiplier)}</td>
                     </tr>
                     <tr class="highlight-row">
                         <td><strong>ROE</strong></td>
                         <td>Margin × Turnover × Multiplier</td>
-                        <td class="text-right"><strong>{fmt_pct(actual_roe)}</strong></td>
+                        <td class="text-right"><strong>{_fmt_pct(actual_roe)}</strong></td>
                     </tr>
                 </tbody>
             </table>
@@ -1002,7 +1318,10 @@ Write ONLY the description. No preamble."""
 
     def _generate_dupont_analysis(self, net_margin, asset_turnover, equity_multiplier, roe) -> str:
         """Generate LLM-powered DuPont analysis (one sentence)."""
-        if not self.client:
+        # Nothing to analyse: skip the LLM round trip entirely
+        if not all([net_margin, asset_turnover, equity_multiplier]):
+            return _DUPONT_INSUFFICIENT
+        if not self.client or roe is None:
             return self._fallback_dupont_analysis(net_margin, asset_turnover, equity_multiplier, roe)
 
         company_name = self.overview.get('name', self.ticker)
@@ -1018,7 +1337,7 @@ In ONE sentence: identify the primary ROE driver and why."""
     def _fallback_dupont_analysis(self, net_margin, asset_turnover, equity_multiplier, roe) -> str:
         """Fallback analysis when LLM is unavailable."""
         if not all([net_margin, asset_turnover, equity_multiplier]):
-            return "Insufficient data for DuPont analysis."
+            return _DUPONT_INSUFFICIENT
 
         margin_contribution = net_margin / 0.10
         turnover_contribution = asset_turnover / 0.75
@@ -1252,22 +1571,15 @@ In ONE sentence: identify the primary ROE driver and why."""
         ddm_scenarios = ddm.get_scenario_analysis()
         ddm_applicable = ddm_scenarios.get('applicable', False)
         
-        def fmt_price(v):
-            return f"${v:,.2f}" if v else "N/A"
-        
-        def fmt_upside(v):
-            if v is None:
-                return "N/A"
-            return f"{v*100:+.1f}%"
-        
-        def get_upside_class(upside):
-            if upside is None:
-                return ''
-            if upside > 0.15:
-                return 'class="positive"'
-            elif upside < -0.10:
-                return 'class="negative"'
-            return ''
+        # DCF/multiples weights with the DDM share redistributed; the same for
+        # every scenario that has no DDM value, so compute them once
+        dcf_mult_weight = dcf_weight + mult_weight
+        if ddm_weight > 0 and dcf_mult_weight > 0:
+            no_ddm_dcf_weight = dcf_weight + (ddm_weight * dcf_weight / dcf_mult_weight)
+            no_ddm_mult_weight = mult_weight + (ddm_weight * mult_weight / dcf_mult_weight)
+        else:
+            no_ddm_dcf_weight = dcf_weight
+            no_ddm_mult_weight = mult_weight
         
         scenario_results = {}
         
@@ -1281,9 +1593,9 @@ In ONE sentence: identify the primary ROE driver and why."""
             else:
                 ddm_fv = None
             
-            if ddm_fv is None and ddm_weight > 0:
-                adj_dcf_weight = dcf_weight + (ddm_weight * dcf_weight / (dcf_weight + mult_weight)) if (dcf_weight + mult_weight) > 0 else dcf_weight
-                adj_mult_weight = mult_weight + (ddm_weight * mult_weight / (dcf_weight + mult_weight)) if (dcf_weight + mult_weight) > 0 else mult_weight
+            if ddm_fv is None:
+                adj_dcf_weight = no_ddm_dcf_weight
+                adj_mult_weight = no_ddm_mult_weight
             else:
                 adj_dcf_weight = dcf_weight
                 adj_mult_weight = mult_weight
@@ -1342,30 +1654,30 @@ In ONE sentence: identify the primary ROE driver and why."""
                 <tbody>
                     <tr style="background: #fef2f2;">
                         <td><strong>Bear Case</strong></td>
-                        <td class="text-center">{fmt_price(bear['dcf_fv'])}</td>
-                        <td class="text-center">{fmt_price(bear['mult_fv'])}</td>
-                        <td class="text-center"><strong>{fmt_price(bear['target_price'])}</strong></td>
-                        <td class="text-center" {get_upside_class(bear['upside'])}>{fmt_upside(bear['upside'])}</td>
+                        <td class="text-center">{_fmt_price(bear['dcf_fv'])}</td>
+                        <td class="text-center">{_fmt_price(bear['mult_fv'])}</td>
+                        <td class="text-center"><strong>{_fmt_price(bear['target_price'])}</strong></td>
+                        <td class="text-center" {_upside_class(bear['upside'])}>{_fmt_upside(bear['upside'])}</td>
                     </tr>
                     <tr style="background: #f0fdf4;">
                         <td><strong>Base Case</strong></td>
-                        <td class="text-center">{fmt_price(base['dcf_fv'])}</td>
-                        <td class="text-center">{fmt_price(base['mult_fv'])}</td>
-                        <td class="text-center"><strong>{fmt_price(base['target_price'])}</strong></td>
-                        <td class="text-center" {get_upside_class(base['upside'])}>{fmt_upside(base['upside'])}</td>
+                        <td class="text-center">{_fmt_price(base['dcf_fv'])}</td>
+                        <td class="text-center">{_fmt_price(base['mult_fv'])}</td>
+                        <td class="text-center"><strong>{_fmt_price(base['target_price'])}</strong></td>
+                        <td class="text-center" {_upside_class(base['upside'])}>{_fmt_upside(base['upside'])}</td>
                     </tr>
                     <tr style="background: #eff6ff;">
                         <td><strong>Bull Case</strong></td>
-                        <td class="text-center">{fmt_price(bull['dcf_fv'])}</td>
-                        <td class="text-center">{fmt_price(bull['mult_fv'])}</td>
-                        <td class="text-center"><strong>{fmt_price(bull['target_price'])}</strong></td>
-                        <td class="text-center" {get_upside_class(bull['upside'])}>{fmt_upside(bull['upside'])}</td>
+                        <td class="text-center">{_fmt_price(bull['dcf_fv'])}</td>
+                        <td class="text-center">{_fmt_price(bull['mult_fv'])}</td>
+                        <td class="text-center"><strong>{_fmt_price(bull['target_price'])}</strong></td>
+                        <td class="text-center" {_upside_class(bull['upside'])}>{_fmt_upside(bull['upside'])}</td>
                     </tr>
                 </tbody>
             </table>
             
             <p style="font-size: 9pt; color: #6b7280; margin-top: 0.5em;">
-                Current Price: {fmt_price(current_price)} | Multiples value fixed across scenarios
+                Current Price: {_fmt_price(current_price)} | Multiples value fixed across scenarios
             </p>
             
             <p style="margin-top: 1em; padding: 10px; background: #f9fafb; border-left: 4px solid #6b7280;">
@@ -1660,28 +1972,22 @@ In ONE sentence: identify the primary ROE driver and why."""
         if beta > 1.5:
             risk_rows.append(('Medium', 'Volatility', f'Beta {beta:.2f} amplifies market moves'))
         
-        sector_risks = {
-            'Technology': ('Medium', 'Competitive', 'Rapid innovation cycle; market share vulnerable'),
-            'Energy': ('Medium', 'Regulatory', 'Export controls; geopolitical restrictions'),
-            'Financial Services': ('Medium', 'Regulatory', 'Regulatory changes may impact profitability'),
-        }
-        
-        for sector_key, (severity, category, signal) in sector_risks.items():
-            if sector_key.lower() in sector.lower():
-                risk_rows.append((severity, category, signal))
+        sector_lower = sector.lower()
+        for sector_key, risk_row in _SECTOR_RISKS:
+            if sector_key in sector_lower:
+                risk_rows.append(risk_row)
                 break
         
-        severity_order = {'High': 0, 'Medium': 1, 'Low': 2}
-        risk_rows.sort(key=lambda x: severity_order.get(x[0], 3))
+        risk_rows.sort(key=lambda x: _SEVERITY_ORDER.get(x[0], 3))
         
-        risk_table_rows = ""
-        for severity, category, signal in risk_rows:
-            severity_class = f'risk-{severity.lower()}'
-            risk_table_rows += f"""<tr>
-                <td class="{severity_class}">{severity}</td>
+        risk_table_rows = "".join(
+            f"""<tr>
+                <td class="risk-{severity.lower()}">{severity}</td>
                 <td>{category}</td>
                 <td>{signal}</td>
             </tr>"""
+            for severity, category, signal in risk_rows
+        )
         
         risk_table = f"""
         <h3>6.1 KEY RISKS</h3>
@@ -1799,281 +2105,13 @@ Format: Plain text paragraphs."""
     
     
     def _appendix_a_methodology(self) -> str:
-        from config.settings import (
-            COMPANY_TYPE_WEIGHTS,
-            BUY_THRESHOLD,
-            SELL_THRESHOLD,
-            MIN_INTEREST_COVERAGE,
-            MIN_CURRENT_RATIO
-        )
-        
-        growth_w = COMPANY_TYPE_WEIGHTS.get('growth', {})
-        balanced_w = COMPANY_TYPE_WEIGHTS.get('balanced', {})
-        dividend_w = COMPANY_TYPE_WEIGHTS.get('dividend', {})
-        cyclical_w = COMPANY_TYPE_WEIGHTS.get('cyclical', {})
-        
-        return f"""
-        <h2>Appendix A: Scoring Methodology</h2>
-        
-        <p>The recommendation is based on valuation upside—the percentage difference between the calculated Target Price and Current Price. The Target Price is a weighted blend of three valuation methods, with weights determined by company classification.</p>
-        
-        <h3>Step 1: Calculate Target Price</h3>
-        
-        <table>
-            <thead>
-                <tr>
-                    <th>Method</th>
-                    <th>Description</th>
-                </tr>
-            </thead>
-            <tbody>
-                <tr>
-                    <td><strong>DCF</strong></td>
-                    <td>Intrinsic value based on projected free cash flows discounted to present value</td>
-                </tr>
-                <tr>
-                    <td><strong>Multiples</strong></td>
-                    <td>Fair value based on P/E, EV/EBITDA, and P/B multiples vs peer companies</td>
-                </tr>
-                <tr>
-                    <td><strong>DDM</strong></td>
-                    <td>Value based on expected dividend stream using Gordon Growth Model</td>
-                </tr>
-            </tbody>
-        </table>
-        
-        <h3>Valuation Weights by Company Type</h3>
-        
-        <table>
-            <thead>
-                <tr>
-                    <th>Company Type</th>
-                    <th class="text-center">DCF</th>
-                    <th class="text-center">Multiples</th>
-                    <th class="text-center">DDM</th>
-                </tr>
-            </thead>
-            <tbody>
-                <tr>
-                    <td>Growth</td>
-                    <td class="text-center">{growth_w.get('dcf', 0)*100:.0f}%</td>
-                    <td class="text-center">{growth_w.get('multiples', 0)*100:.0f}%</td>
-                    <td class="text-center">{growth_w.get('ddm', 0)*100:.0f}%</td>
-                </tr>
-                <tr>
-                    <td>Balanced</td>
-                    <td class="text-center">{balanced_w.get('dcf', 0)*100:.0f}%</td>
-                    <td class="text-center">{balanced_w.get('multiples', 0)*100:.0f}%</td>
-                    <td class="text-center">{balanced_w.get('ddm', 0)*100:.0f}%</td>
-                </tr>
-                <tr>
-                    <td>Dividend</td>
-                    <td class="text-center">{dividend_w.get('dcf', 0)*100:.0f}%</td>
-                    <td class="text-center">{dividend_w.get('multiples', 0)*100:.0f}%</td>
-                    <td class="text-center">{dividend_w.get('ddm', 0)*100:.0f}%</td>
-                </tr>
-                <tr>
-                    <td>Cyclical</td>
-                    <td class="text-center">{cyclical_w.get('dcf', 0)*100:.0f}%</td>
-                    <td class="text-center">{cyclical_w.get('multiples', 0)*100:.0f}%</td>
-                    <td class="text-center">{cyclical_w.get('ddm', 0)*100:.0f}%</td>
-                </tr>
-            </tbody>
-        </table>
-        
-        <h3>Step 2: Calculate Upside</h3>
-        <p><code>Upside = (Target Price - Current Price) / Current Price × 100%</code></p>
-        
-        <h3>Step 3: Gate Checks (Safety Filters)</h3>
-        
-        <table>
-            <thead>
-                <tr>
-                    <th>Gate</th>
-                    <th class="text-center">Threshold</th>
-                    <th class="text-center">Severity</th>
-                </tr>
-            </thead>
-            <tbody>
-                <tr>
-                    <td>Interest Coverage</td>
-                    <td class="text-center">≥ {MIN_INTEREST_COVERAGE}x</td>
-                    <td class="text-center">CRITICAL</td>
-                </tr>
-                <tr>
-                    <td>Current Ratio</td>
-                    <td class="text-center">≥ {MIN_CURRENT_RATIO}x</td>
-                    <td class="text-center">HIGH</td>
-                </tr>
-                <tr>
-                    <td>Debt/Equity</td>
-                    <td class="text-center">≤ 5.0x</td>
-                    <td class="text-center">HIGH</td>
-                </tr>
-            </tbody>
-        </table>
-        
-        <h3>Step 4: Recommendation Logic</h3>
-        
-        <table>
-            <thead>
-                <tr>
-                    <th>Condition</th>
-                    <th>Recommendation</th>
-                </tr>
-            </thead>
-            <tbody>
-                <tr>
-                    <td>Upside &gt; {BUY_THRESHOLD*100:+.0f}% AND no HIGH/CRITICAL gates</td>
-                    <td><strong>BUY</strong></td>
-                </tr>
-                <tr>
-                    <td>Upside &gt; {BUY_THRESHOLD*100:+.0f}% BUT has HIGH gate</td>
-                    <td><strong>HOLD</strong></td>
-                </tr>
-                <tr>
-                    <td>{SELL_THRESHOLD*100:.0f}% &lt; Upside &lt; {BUY_THRESHOLD*100:+.0f}%</td>
-                    <td><strong>HOLD</strong></td>
-                </tr>
-                <tr>
-                    <td>Upside &lt; {SELL_THRESHOLD*100:.0f}%</td>
-                    <td><strong>SELL</strong></td>
-                </tr>
-                <tr>
-                    <td>Any CRITICAL gate triggered</td>
-                    <td><strong>SELL</strong></td>
-                </tr>
-            </tbody>
-        </table>
-        """
+        return _APPENDIX_A_TEMPLATE.format_map(_appendix_context())
     
     
     def _appendix_b_classification(self) -> str:
-        from config.settings import COMPANY_TYPE_WEIGHTS
-        
-        growth_w = COMPANY_TYPE_WEIGHTS.get('growth', {})
-        balanced_w = COMPANY_TYPE_WEIGHTS.get('balanced', {})
-        dividend_w = COMPANY_TYPE_WEIGHTS.get('dividend', {})
-        cyclical_w = COMPANY_TYPE_WEIGHTS.get('cyclical', {})
-        
-        return f"""
-        <h2>Appendix B: Company Classification Framework</h2>
-        
-        <p>Companies are classified into four types based on dividend yield, revenue growth, and sector. Each type uses different valuation weights optimized for its characteristics.</p>
-        
-        <h3>Classification Criteria & Valuation Weights</h3>
-        
-        <table>
-            <thead>
-                <tr>
-                    <th>Type</th>
-                    <th>Criteria</th>
-                    <th class="text-center">DCF</th>
-                    <th class="text-center">Multiples</th>
-                    <th class="text-center">DDM</th>
-                    <th>Typical Sectors</th>
-                </tr>
-            </thead>
-            <tbody>
-                <tr>
-                    <td><strong>Growth</strong></td>
-                    <td>Dividend &lt;2%, Revenue Growth &gt;15%</td>
-                    <td class="text-center">{growth_w.get('dcf', 0)*100:.0f}%</td>
-                    <td class="text-center">{growth_w.get('multiples', 0)*100:.0f}%</td>
-                    <td class="text-center">{growth_w.get('ddm', 0)*100:.0f}%</td>
-                    <td>Technology, Biotech, Software, Semiconductors</td>
-                </tr>
-                <tr>
-                    <td><strong>Balanced</strong></td>
-                    <td>Dividend 2-4%, Revenue Growth 10-15%</td>
-                    <td class="text-center">{balanced_w.get('dcf', 0)*100:.0f}%</td>
-                    <td class="text-center">{balanced_w.get('multiples', 0)*100:.0f}%</td>
-                    <td class="text-center">{balanced_w.get('ddm', 0)*100:.0f}%</td>
-                    <td>Healthcare, Financials, Industrials</td>
-                </tr>
-                <tr>
-                    <td><strong>Dividend</strong></td>
-                    <td>Dividend &gt;4%, Revenue Growth &lt;10%</td>
-                    <td class="text-center">{dividend_w.get('dcf', 0)*100:.0f}%</td>
-                    <td class="text-center">{dividend_w.get('multiples', 0)*100:.0f}%</td>
-                    <td class="text-center">{dividend_w.get('ddm', 0)*100:.0f}%</td>
-                    <td>Utilities, REITs, Telecom, Consumer Staples</td>
-                </tr>
-                <tr>
-                    <td><strong>Cyclical</strong></td>
-                    <td>Sector-based classification</td>
-                    <td class="text-center">{cyclical_w.get('dcf', 0)*100:.0f}%</td>
-                    <td class="text-center">{cyclical_w.get('multiples', 0)*100:.0f}%</td>
-                    <td class="text-center">{cyclical_w.get('ddm', 0)*100:.0f}%</td>
-                    <td>Energy, Materials, Chemicals, Automotive</td>
-                </tr>
-            </tbody>
-        </table>
-        
-        <h3>Classification Logic</h3>
-        
-        <table>
-            <thead>
-                <tr>
-                    <th>Step</th>
-                    <th>Check</th>
-                    <th>Result</th>
-                </tr>
-            </thead>
-            <tbody>
-                <tr>
-                    <td>1</td>
-                    <td>Sector in [Energy, Materials, Chemicals, Automotive]</td>
-                    <td>→ <strong>CYCLICAL</strong></td>
-                </tr>
-                <tr>
-                    <td>2</td>
-                    <td>Dividend Yield &gt; 4%</td>
-                    <td>→ <strong>DIVIDEND</strong></td>
-                </tr>
-                <tr>
-                    <td>3</td>
-                    <td>Revenue Growth &gt; 15% AND Dividend &lt; 2%</td>
-                    <td>→ <strong>GROWTH</strong></td>
-                </tr>
-                <tr>
-                    <td>4</td>
-                    <td>All other cases</td>
-                    <td>→ <strong>BALANCED</strong></td>
-                </tr>
-            </tbody>
-        </table>
-        
-        <h3>Weighting Rationale</h3>
-        
-        <table>
-            <thead>
-                <tr>
-                    <th>Method</th>
-                    <th>Best For</th>
-                    <th>Limitations</th>
-                </tr>
-            </thead>
-            <tbody>
-                <tr>
-                    <td><strong>DCF</strong></td>
-                    <td>Companies with visible, sustainable cash flows</td>
-                    <td>Less reliable for high-growth (forecast uncertainty) and cyclical (volatile earnings)</td>
-                </tr>
-                <tr>
-                    <td><strong>Multiples</strong></td>
-                    <td>Peer benchmarking when sector dynamics drive valuation</td>
-                    <td>Requires comparable peers; can reflect market mispricing</td>
-                </tr>
-                <tr>
-                    <td><strong>DDM</strong></td>
-                    <td>Companies with established, stable dividend policies</td>
-                    <td>Not applicable for non-dividend or variable dividend companies</td>
-                </tr>
-            </tbody>
-        </table>
-        """
-
+        return _APPENDIX_B_TEMPLATE.format_map(_appendix_context())
+    
+    
     def _appendix_c_limitations(self) -> str:
         return """
         <h2>Appendix C: Model Limitations</h2>
@@ -16,11 +16,12 @@ import sys
 import argparse
 from pathlib import Path
 
-# Load environment variables from root .env
-from dotenv import load_dotenv
-
 PROJECT_ROOT = Path(__file__).parent
-load_dotenv(PROJECT_ROOT / ".env")
+
+# Load environment variables from root .env unless both keys are already exported
+if not (os.getenv("ALPHA_VANTAGE_API_KEY") and os.getenv("OPENAI_API_KEY")):
+    from dotenv import load_dotenv
+    load_dotenv(PROJECT_ROOT / ".env")
 
 # Add hybrid_controller to path
 sys.path.insert(0, str(PROJECT_ROOT / "hybrid_controller"))
@@ -39,6 +40,7 @@ Examples:
     python run_analysis.py NVDA           # Analyze NVIDIA
     python run_analysis.py AAPL           # Analyze Apple
     python run_analysis.py MSFT --output reports  # Custom output dir
+    python run_analysis.py NVDA --force   # Ignore today's cached fundamental run
 
 Required API Keys (in .env file):
     ALPHA_VANTAGE_API_KEY  - Required for financial data
@@ -56,6 +58,16 @@ Required API Keys (in .env file):
         default="hybrid_controller/outputs",
         help="Output directory (default: hybrid_controller/outputs)"
     )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Re-run the fundamental agent even if today's evidence already exists"
+    )
+    parser.add_argument(
+        "--parallel",
+        action="store_true",
+        help="Run the technical agent concurrently with the fundamental agent"
+    )
 
     args = parser.parse_args()
     ticker = args.ticker.upper()
@@ -79,7 +91,7 @@ Required API Keys (in .env file):
     try:
         # Run hybrid analysis
         print(f"\n[1/4] Running hybrid analysis...")
-        evidence = run_hybrid_analysis(ticker)
+        evidence = run_hybrid_analysis(ticker, force=args.force, parallel=args.parallel)
 
         # Prepare output directory
         output_dir = PROJECT_ROOT / args.output